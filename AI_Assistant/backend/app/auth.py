@@ -5,22 +5,26 @@ import os
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+import bcrypt
+import jwt
 
 SECRET_KEY = os.getenv("SECRET_KEY", "rag-memory-assistant-secret-key-change-in-prod")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_HOURS = 24 * 7  # 7天
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
 
 
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    # 直接调用 bcrypt C 扩展，省去 passlib 的方案识别与分发开销
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=BCRYPT_ROUNDS)).decode()
 
 
 def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+    try:
+        return bcrypt.checkpw(plain.encode(), hashed.encode())
+    except ValueError:
+        # 哈希格式非法（如历史脏数据），按校验失败处理
+        return False
 
 
 def create_access_token(user_id: str, username: str) -> str:
@@ -31,7 +35,10 @@ def create_access_token(user_id: str, username: str) -> str:
 
 def decode_token(token: str) -> Optional[dict]:
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(
+            token, SECRET_KEY, algorithms=[ALGORITHM],
+            options={"require": ["exp", "sub"]},
+        )
         return payload
-    except JWTError:
+    except jwt.PyJWTError:
         return None
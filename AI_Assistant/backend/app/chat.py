@@ -3,19 +3,19 @@ chat.py - 带 RAG 增强的 LLM 对话逻辑（流式输出）
 
 流程：
   1. 调用 RAG_Memory query 接口获取增强上下文
-  2. 构造带记忆上下文的系统 Prompt
+  2. 固定系统 Prompt + 独立的记忆上下文消息
   3. 调用 DeepSeek（OpenAI 兼容接口）流式生成回答
   4. 流式 yield token
-  5. 完整回答生成后，异步触发 RAG_Memory upload
+  5. 完整回答生成后，放入上传队列，由后台 worker 写入 RAG_Memory
 """
 import asyncio
-import json
 import os
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Callable, Optional
 
+import orjson
 from openai import AsyncOpenAI
 
-from app.rag_client import query_memory, upload_memory
+from app.rag_client import enqueue_upload, query_memory
 
 API_KEY = os.getenv("MY_API_KEY", "")
 API_BASE = os.getenv("MY_API_BASE", "https://api.chat.csu.edu.cn/v1")
@@ -23,37 +23,48 @@ MODEL = os.getenv("MY_MODEL", "deepseek-v3-thinking")
 
 _llm = AsyncOpenAI(api_key=API_KEY, base_url=API_BASE)
 
-SYSTEM_PROMPT_TEMPLATE = """你是一个智能个人助手，拥有持久记忆能力。你能记住用户过去的对话内容和个人信息，并在回答时加以利用，提供个性化的回答。
+# 传给 LLM 的历史消息上限（调用方在 SQL 层按此截断，避免 context 过长）
+HISTORY_LIMIT = 20
 
-{memory_section}
+# SSE 帧的固定部分，预编码为 bytes，避免逐 token 重复构造
+_FRAME_PREFIX = b"data: "
+_FRAME_SUFFIX = b"\n\n"
+_DONE_FRAME = b"data: [DONE]\n\n"
 
-请根据以上记忆信息，结合当前对话，给出准确、个性化的回答。若记忆中没有相关信息，则直接回答即可。"""
+# 系统 Prompt 保持为固定字符串：每轮请求前缀完全一致，可命中服务商的前缀缓存（prefix cache）
+SYSTEM_PROMPT = """你是一个智能个人助手，拥有持久记忆能力。你能记住用户过去的对话内容和个人信息，并在回答时加以利用，提供个性化的回答。
 
+系统会在对话开头以 <memory> 标签提供你关于该用户的记忆。请根据这些记忆信息，结合当前对话，给出准确、个性化的回答。若记忆中没有相关信息，则直接回答即可。"""
 
-def _build_system_prompt(augmented_context: str) -> str:
+
+def _build_memory_message(augmented_context: str) -> dict:
+    """将动态的记忆上下文包装为独立消息，放在固定系统 Prompt 之后。"""
     if augmented_context and augmented_context.strip() and "暂无" not in augmented_context:
         memory_section = f"## 你关于该用户的记忆\n\n{augmented_context}"
     else:
         memory_section = "## 记忆状态\n\n（该用户暂无历史记忆，这是全新对话）"
-    return SYSTEM_PROMPT_TEMPLATE.format(memory_section=memory_section)
+    return {"role": "user", "content": f"<memory>\n{memory_section}\n</memory>"}
 
 
 async def chat_stream(
     user_id: str,
     query: str,
     history: list[dict],
-) -> AsyncGenerator[str, None]:
+    on_token: Optional[Callable[[str], None]] = None,
+) -> AsyncGenerator[bytes, None]:
     """
     流式对话生成器：RAG 增强 → LLM 流式输出 → 后台 upload 记忆。
 
     Args:
-        user_id: 用户 ID（同时作为 RAG_Memory 的 user_id）。
-        query:   用户当前输入。
-        history: 本次对话的历史消息列表（不含当前 query）。
+        user_id:  用户 ID（同时作为 RAG_Memory 的 user_id）。
+        query:    用户当前输入。
+        history:  本次对话最近 HISTORY_LIMIT 条历史消息（不含当前 query）。
+        on_token: 可选回调，每输出一段文本（含错误提示）即以原文调用一次，
+                  供调用方收集完整回答而无需再解析 SSE 帧。
 
     Yields:
-        SSE 格式的字符串，每帧为 "data: {json}\n\n"
-        结束帧为 "data: [DONE]\n\n"
+        SSE 格式的 UTF-8 bytes，每帧为 b"data: {json}\n\n"
+        结束帧为 b"data: [DONE]\n\n"
     """
     # Step 1: 并发获取 RAG 上下文（不阻塞，超时则降级）
     try:
@@ -62,18 +73,18 @@ async def chat_stream(
     except asyncio.TimeoutError:
         augmented_context = ""
 
-    # Step 2: 构造消息列表
-    system_prompt = _build_system_prompt(augmented_context)
-    messages = [{"role": "system", "content": system_prompt}]
+    # Step 2: 构造消息列表（固定系统 Prompt 在前，动态记忆作为独立消息紧随其后）
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        _build_memory_message(augmented_context),
+    ]
 
-    # 加入历史消息（最多保留最近 20 条，避免 context 过长）
-    recent_history = history[-20:] if len(history) > 20 else history
-    messages.extend(recent_history)
+    # 加入历史消息（调用方已在查询时限制为最近 HISTORY_LIMIT 条）
+    messages.extend(history)
     messages.append({"role": "user", "content": query})
 
     # Step 3: 流式调用 LLM
-    # Step 3: 流式调用 LLM
-    full_response = ""
+    response_parts: list[str] = []
     try:
         stream = await _llm.chat.completions.create(
             model=MODEL,
@@ -87,51 +98,34 @@ async def chat_stream(
             # 【关键修复 1】防御性判断：如果 choices 为空，直接跳过当前 chunk
             if not chunk.choices:
                 continue
-                
+
             delta = chunk.choices[0].delta
-            
+
             # 【关键修复 2】确保 content 不是 None 再拼接
             if delta.content:
-                full_response += delta.content
-                # SSE 格式输出
-                yield f"data: {json.dumps({'content': delta.content}, ensure_ascii=False)}\n\n"
+                response_parts.append(delta.content)
+                if on_token:
+                    on_token(delta.content)
+                # SSE 格式输出（orjson 直接产出 UTF-8 bytes）
+                yield _FRAME_PREFIX + orjson.dumps({"content": delta.content}) + _FRAME_SUFFIX
 
     except Exception as e:
         error_msg = f"LLM 调用失败：{str(e)}"
-        yield f"data: {json.dumps({'content': error_msg, 'error': True}, ensure_ascii=False)}\n\n"
-        full_response = error_msg
-    # full_response = ""
-    # try:
-    #     stream = await _llm.chat.completions.create(
-    #         model=MODEL,
-    #         messages=messages,
-    #         stream=True,
-    #         temperature=0.7,
-    #         max_tokens=4096,
-    #     )
-
-    #     async for chunk in stream:
-    #         delta = chunk.choices[0].delta
-    #         if delta.content:
-    #             full_response += delta.content
-    #             # SSE 格式输出
-    #             yield f"data: {json.dumps({'content': delta.content}, ensure_ascii=False)}\n\n"
-
-    # except Exception as e:
-    #     error_msg = f"LLM 调用失败：{str(e)}"
-    #     yield f"data: {json.dumps({'content': error_msg, 'error': True}, ensure_ascii=False)}\n\n"
-    #     full_response = error_msg
-
-    yield "data: [DONE]\n\n"
-
-    # Step 4: 后台异步上传本轮对话到 RAG_Memory（不阻塞流式响应）
+        if on_token:
+            on_token(error_msg)
+        yield _FRAME_PREFIX + orjson.dumps({"content": error_msg, "error": True}) + _FRAME_SUFFIX
+        response_parts = [error_msg]
+
+    yield _DONE_FRAME
+
+    full_response = "".join(response_parts)
+
+    # Step 4: 放入后台上传队列，由 worker 异步写入 RAG_Memory（不阻塞流式响应）
     if full_response and "LLM 调用失败" not in full_response:
-        asyncio.create_task(
-            upload_memory(
-                user_id=user_id,
-                messages=[
-                    {"role": "user", "content": query},
-                    {"role": "assistant", "content": full_response},
-                ],
-            )
+        enqueue_upload(
+            user_id=user_id,
+            messages=[
+                {"role": "user", "content": query},
+                {"role": "assistant", "content": full_response},
+            ],
         )
@@ -2,13 +2,32 @@
 database.py - 数据库初始化与会话管理
 使用 SQLAlchemy 异步引擎 + SQLite
 """
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 DATABASE_URL = "sqlite+aiosqlite:///./ai_assistant.db"
 
-engine = create_async_engine(DATABASE_URL, echo=False)
-AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+# aiosqlite 文件库默认使用 NullPool（每次会话新建连接），显式启用连接池以复用连接及其页缓存
+engine = create_async_engine(
+    DATABASE_URL, echo=False, poolclass=AsyncAdaptedQueuePool, pool_size=10
+)
+
+
+@event.listens_for(engine.sync_engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL：写事务提交时不阻塞读；NORMAL：WAL 模式下仅在检查点 fsync
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA cache_size=-65536")      # 64 MiB 页缓存
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")    # 256 MiB 内存映射
+    cursor.close()
+
+
+AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False)
 
 
 class Base(DeclarativeBase):
@@ -20,7 +39,15 @@ async def get_db():
         yield session
 
 
+def _create_missing_indexes(sync_conn):
+    # create_all 只为新建的表创建索引，已有数据库需单独补建（CREATE INDEX IF NOT EXISTS）
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
+
+
 async def init_db():
     from app.models import User, Conversation, Message  # noqa
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_create_missing_indexes)
@@ -11,33 +11,47 @@ main.py - AI_Assistant 后端主程序
   GET  /conversations/{id}/messages  获取消息历史
   POST /conversations/{id}/chat      流式对话（SSE）
 """
+import asyncio
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from typing import Optional
 
+from cachetools import TTLCache
 from fastapi import Depends, FastAPI, Header, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
-from sqlalchemy import select, update
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 from app.auth import create_access_token, decode_token, hash_password, verify_password
-from app.chat import chat_stream
+from app.chat import HISTORY_LIMIT, chat_stream
 from app.database import get_db, init_db
-from app.models import Conversation, Message, User
+from app.models import Conversation, Message, User, new_id, utcnow
+from app.rag_client import close_client, start_upload_workers, stop_upload_workers
 
 
 # ── 生命周期 ──────────────────────────────────────────────────
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # bcrypt 为纯 CPU 计算，线程池按核数配置，让哈希任务在多核上并行
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=os.cpu_count())
+    )
     await init_db()
+    start_upload_workers()
     print("AI_Assistant 后端启动完成")
     yield
+    await stop_upload_workers()
+    await close_client()
 
 
-app = FastAPI(title="AI_Assistant Backend", lifespan=lifespan)
+app = FastAPI(title="AI_Assistant Backend", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -50,6 +64,10 @@ app.add_middleware(
 
 # ── 认证依赖 ──────────────────────────────────────────────────
 
+# token 摘要 → (User, exp)：短时间内复用验签与查库结果；以摘要为键，内存中不保留原始 token
+_user_cache: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+
+
 async def get_current_user(
     authorization: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db),
@@ -57,6 +75,11 @@ async def get_current_user(
     if not authorization or not authorization.startswith("Bearer "):
         raise HTTPException(status_code=401, detail="未提供认证令牌")
     token = authorization.split(" ", 1)[1]
+    cache_key = hashlib.sha256(token.encode()).digest()
+    cached = _user_cache.get(cache_key)
+    if cached and cached[1] > time.time():
+        return cached[0]
+
     payload = decode_token(token)
     if not payload:
         raise HTTPException(status_code=401, detail="令牌无效或已过期")
@@ -64,6 +87,7 @@ async def get_current_user(
     user = result.scalar_one_or_none()
     if not user:
         raise HTTPException(status_code=401, detail="用户不存在")
+    _user_cache[cache_key] = (user, payload["exp"])
     return user
 
 
@@ -88,13 +112,16 @@ class ChatRequest(BaseModel):
 
 @app.post("/auth/register")
 async def register(req: RegisterRequest, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(User).where(User.username == req.username))
-    if result.scalar_one_or_none():
-        raise HTTPException(status_code=400, detail="用户名已存在")
-    user = User(username=req.username, hashed_password=hash_password(req.password))
+    hashed = await asyncio.to_thread(hash_password, req.password)
+    # 主键与时间戳在客户端生成，提交后无需 refresh 回读
+    user = User(id=new_id(), username=req.username, hashed_password=hashed)
     db.add(user)
-    await db.commit()
-    await db.refresh(user)
+    # 依赖 username 的 UNIQUE 约束判重：成功路径只需一次 INSERT，且无并发注册竞态
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="用户名已存在")
     token = create_access_token(user.id, user.username)
     return {"token": token, "user_id": user.id, "username": user.username}
 
@@ -103,7 +130,7 @@ async def register(req: RegisterRequest, db: AsyncSession = Depends(get_db)):
 async def login(req: LoginRequest, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(User).where(User.username == req.username))
     user = result.scalar_one_or_none()
-    if not user or not verify_password(req.password, user.hashed_password):
+    if not user or not await asyncio.to_thread(verify_password, req.password, user.hashed_password):
         raise HTTPException(status_code=401, detail="用户名或密码错误")
     token = create_access_token(user.id, user.username)
     return {"token": token, "user_id": user.id, "username": user.username}
@@ -111,21 +138,29 @@ async def login(req: LoginRequest, db: AsyncSession = Depends(get_db)):
 
 # ── 会话管理接口 ──────────────────────────────────────────────
 
+async def _owns_conversation(db: AsyncSession, conv_id: str, user_id: str) -> bool:
+    """只查询主键判断会话归属，不构造 ORM 对象。"""
+    result = await db.execute(
+        select(Conversation.id)
+        .where(Conversation.id == conv_id, Conversation.user_id == user_id)
+        .limit(1)
+    )
+    return result.scalar_one_or_none() is not None
+
+
 @app.get("/conversations")
 async def list_conversations(
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     result = await db.execute(
-        select(Conversation)
+        select(Conversation.id, Conversation.title, Conversation.created_at, Conversation.updated_at)
         .where(Conversation.user_id == user.id)
         .order_by(Conversation.updated_at.desc())
     )
-    convs = result.scalars().all()
     return [
-        {"id": c.id, "title": c.title, "created_at": c.created_at.isoformat(),
-         "updated_at": c.updated_at.isoformat()}
-        for c in convs
+        {"id": conv_id, "title": title, "created_at": created_at, "updated_at": updated_at}
+        for conv_id, title, created_at, updated_at in result.all()
     ]
 
 
@@ -134,11 +169,10 @@ async def create_conversation(
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    conv = Conversation(user_id=user.id, title="新对话")
+    conv = Conversation(id=new_id(), user_id=user.id, title="新对话", created_at=utcnow())
     db.add(conv)
     await db.commit()
-    await db.refresh(conv)
-    return {"id": conv.id, "title": conv.title, "created_at": conv.created_at.isoformat()}
+    return {"id": conv.id, "title": conv.title, "created_at": conv.created_at}
 
 
 @app.patch("/conversations/{conv_id}")
@@ -149,14 +183,14 @@ async def rename_conversation(
     db: AsyncSession = Depends(get_db),
 ):
     result = await db.execute(
-        select(Conversation).where(Conversation.id == conv_id, Conversation.user_id == user.id)
+        update(Conversation)
+        .where(Conversation.id == conv_id, Conversation.user_id == user.id)
+        .values(title=req.title)
     )
-    conv = result.scalar_one_or_none()
-    if not conv:
+    if result.rowcount == 0:
         raise HTTPException(status_code=404, detail="会话不存在")
-    conv.title = req.title
     await db.commit()
-    return {"id": conv.id, "title": conv.title}
+    return {"id": conv_id, "title": req.title}
 
 
 @app.delete("/conversations/{conv_id}", status_code=204)
@@ -165,13 +199,11 @@ async def delete_conversation(
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(
-        select(Conversation).where(Conversation.id == conv_id, Conversation.user_id == user.id)
-    )
-    conv = result.scalar_one_or_none()
-    if not conv:
+    # 直接按条件删除，无需先把会话及其全部消息加载为 ORM 对象；先删消息再删会话，满足外键约束
+    if not await _owns_conversation(db, conv_id, user.id):
         raise HTTPException(status_code=404, detail="会话不存在")
-    await db.delete(conv)
+    await db.execute(delete(Message).where(Message.conversation_id == conv_id))
+    await db.execute(delete(Conversation).where(Conversation.id == conv_id))
     await db.commit()
 
 
@@ -181,18 +213,16 @@ async def get_messages(
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
+    if not await _owns_conversation(db, conv_id, user.id):
+        raise HTTPException(status_code=404, detail="会话不存在")
     result = await db.execute(
-        select(Conversation)
-        .where(Conversation.id == conv_id, Conversation.user_id == user.id)
-        .options(selectinload(Conversation.messages))
+        select(Message.id, Message.role, Message.content, Message.created_at)
+        .where(Message.conversation_id == conv_id)
+        .order_by(Message.created_at)
     )
-    conv = result.scalar_one_or_none()
-    if not conv:
-        raise HTTPException(status_code=404, detail="会话不存在")
     return [
-        {"id": m.id, "role": m.role, "content": m.content,
-         "created_at": m.created_at.isoformat()}
-        for m in conv.messages
+        {"id": msg_id, "role": role, "content": content, "created_at": created_at}
+        for msg_id, role, content, created_at in result.all()
     ]
 
 
@@ -212,29 +242,40 @@ async def chat(
     3. 流式生成回答
     4. 在流结束后保存 assistant 消息（由 stream 内部完成）
     """
-    # 验证会话归属
+    # 验证会话归属（只取标题列）
     result = await db.execute(
-        select(Conversation)
+        select(Conversation.title)
         .where(Conversation.id == conv_id, Conversation.user_id == user.id)
-        .options(selectinload(Conversation.messages))
+        .limit(1)
     )
-    conv = result.scalar_one_or_none()
-    if not conv:
+    conv_title = result.scalar_one_or_none()
+    if conv_title is None:
         raise HTTPException(status_code=404, detail="会话不存在")
 
+    # 只取最近 HISTORY_LIMIT 条消息（倒序取再翻转），不加载整段会话历史
+    # 须在 add(user_msg) 之前查询，避免 autoflush 把当前消息带入历史
+    result = await db.execute(
+        select(Message.role, Message.content)
+        .where(Message.conversation_id == conv_id)
+        .order_by(Message.created_at.desc())
+        .limit(HISTORY_LIMIT)
+    )
+    history = [{"role": role, "content": content} for role, content in reversed(result.all())]
+
     # 保存用户消息
     user_msg = Message(conversation_id=conv_id, role="user", content=req.content)
     db.add(user_msg)
 
     # 若是新对话，自动以首条消息前20字作为标题
-    if conv.title == "新对话" and not conv.messages:
-        conv.title = req.content[:20] + ("..." if len(req.content) > 20 else "")
+    if conv_title == "新对话" and not history:
+        await db.execute(
+            update(Conversation)
+            .where(Conversation.id == conv_id)
+            .values(title=req.content[:20] + ("..." if len(req.content) > 20 else ""))
+        )
 
     await db.commit()
 
-    # 准备历史消息（不含刚保存的 user_msg，chat_stream 内部会追加）
-    history = [{"role": m.role, "content": m.content} for m in conv.messages]
-
     # 用于流结束后保存 assistant 消息的闭包
     async def stream_with_save():
         full_content = []
@@ -242,15 +283,8 @@ async def chat(
             user_id=user.id,   # 用 user.id 作为 RAG_Memory 的 user_id
             query=req.content,
             history=history,
+            on_token=full_content.append,
         ):
-            if chunk != "data: [DONE]\n\n":
-                import json as _json
-                try:
-                    data = _json.loads(chunk[6:])  # strip "data: "
-                    if "content" in data:
-                        full_content.append(data["content"])
-                except Exception:
-                    pass
             yield chunk
 
         # 流结束后保存 assistant 消息
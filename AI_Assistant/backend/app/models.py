@@ -1,10 +1,12 @@
 """
 models.py - SQLAlchemy ORM 模型定义
 """
+import os
+import time
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import DateTime, ForeignKey, String, Text
+from sqlalchemy import DateTime, ForeignKey, Index, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -14,10 +16,21 @@ def utcnow():
     return datetime.now(timezone.utc)
 
 
+def new_id() -> str:
+    """
+    生成 UUIDv7 字符串（RFC 9562）：高 48 位为毫秒时间戳，其余为随机位。
+    按时间递增的主键使新行集中插入 B-tree 索引尾部，格式仍为 36 位 UUID，与历史数据兼容。
+    """
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), "big")
+    value = (value & ~(0xF << 76)) | (0x7 << 76)   # version = 7
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)   # variant = RFC 4122
+    return str(uuid.UUID(int=value))
+
+
 class User(Base):
     __tablename__ = "users"
 
-    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=new_id)
     username: Mapped[str] = mapped_column(String(64), unique=True, nullable=False)
     hashed_password: Mapped[str] = mapped_column(String(256), nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow)
@@ -29,8 +42,12 @@ class User(Base):
 
 class Conversation(Base):
     __tablename__ = "conversations"
+    __table_args__ = (
+        # 会话列表：WHERE user_id = ? ORDER BY updated_at DESC
+        Index("ix_conv_user_updated", "user_id", "updated_at"),
+    )
 
-    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=new_id)
     user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"), nullable=False)
     title: Mapped[str] = mapped_column(String(128), default="新对话")
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=utcnow)
@@ -45,8 +62,12 @@ class Conversation(Base):
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        # 单会话消息：WHERE conversation_id = ? ORDER BY created_at
+        Index("ix_msg_conv_created", "conversation_id", "created_at"),
+    )
 
-    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=new_id)
     conversation_id: Mapped[str] = mapped_column(String(36), ForeignKey("conversations.id"), nullable=False)
     role: Mapped[str] = mapped_column(String(16), nullable=False)   # user | assistant
     content: Mapped[str] = mapped_column(Text, nullable=False)
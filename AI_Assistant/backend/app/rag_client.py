@@ -2,6 +2,7 @@
 rag_client.py - RAG_Memory 接口客户端
 仅通过 HTTP 调用 RAG_Memory 的两个标准接口，与其完全解耦。
 """
+import asyncio
 import os
 from datetime import datetime, timezone
 from typing import Optional
@@ -10,6 +11,21 @@ import httpx
 
 RAG_MEMORY_BASE = os.getenv("RAG_MEMORY_URL", "http://rag-api:8000")
 TIMEOUT = 30.0
+UPLOAD_QUEUE_SIZE = 1000
+UPLOAD_WORKERS = int(os.getenv("RAG_UPLOAD_WORKERS", "4"))
+UPLOAD_BATCH_MAX = 32   # 单个 worker 一次最多合并的待上传条目数
+
+# 模块级共享客户端：复用连接池与 keep-alive 连接，避免每次调用重新握手
+_client = httpx.AsyncClient(
+    base_url=RAG_MEMORY_BASE,
+    timeout=TIMEOUT,
+    limits=httpx.Limits(max_keepalive_connections=100, max_connections=200),
+)
+
+
+async def close_client() -> None:
+    """关闭共享 HTTP 客户端（在应用关闭时调用）。"""
+    await _client.aclose()
 
 
 async def query_memory(user_id: str, query: str) -> dict:
@@ -20,17 +36,15 @@ async def query_memory(user_id: str, query: str) -> dict:
         包含 augmented_context、user_profile、retrieved_chunks 的字典；
         失败时返回空结构，不抛出异常（降级处理）。
     """
-    url = f"{RAG_MEMORY_BASE}/api/v1/chat/memory/query"
     payload = {
         "user_id": user_id,
         "query": query,
         "time": datetime.now(timezone.utc).isoformat(),
     }
     try:
-        async with httpx.AsyncClient(timeout=TIMEOUT) as client:
-            resp = await client.post(url, json=payload)
-            resp.raise_for_status()
-            return resp.json()
+        resp = await _client.post("/api/v1/chat/memory/query", json=payload)
+        resp.raise_for_status()
+        return resp.json()
     except Exception as e:
         print(f"[RAG query 失败] {e}")
         return {"augmented_context": "", "user_profile": "", "retrieved_chunks": []}
@@ -47,17 +61,72 @@ async def upload_memory(user_id: str, messages: list[dict]) -> bool:
     Returns:
         True 表示上传成功，False 表示失败（不影响主流程）。
     """
-    url = f"{RAG_MEMORY_BASE}/api/v1/chat/memory/upload"
     payload = {
         "user_id": user_id,
         "messages": messages,
         "time": datetime.now(timezone.utc).isoformat(),
     }
     try:
-        async with httpx.AsyncClient(timeout=TIMEOUT) as client:
-            resp = await client.post(url, json=payload)
-            resp.raise_for_status()
-            return True
+        resp = await _client.post("/api/v1/chat/memory/upload", json=payload)
+        resp.raise_for_status()
+        return True
     except Exception as e:
         print(f"[RAG upload 失败] {e}")
         return False
+
+
+# ── 后台上传队列 ──────────────────────────────────────────────
+# 有界队列 + 固定数量 worker：限制对 RAG_Memory 的并发上传数，突发流量下不会堆积大量在途请求
+
+_upload_q: asyncio.Queue = asyncio.Queue(maxsize=UPLOAD_QUEUE_SIZE)
+_upload_workers: list[asyncio.Task] = []
+
+
+def enqueue_upload(user_id: str, messages: list[dict]) -> None:
+    """
+    非阻塞地将一轮对话放入上传队列；队列已满时丢弃最旧的一条。
+    """
+    if _upload_q.full():
+        try:
+            _upload_q.get_nowait()
+            _upload_q.task_done()
+            print("[RAG upload 队列已满] 丢弃最旧的待上传对话")
+        except asyncio.QueueEmpty:
+            pass
+    _upload_q.put_nowait((user_id, messages))
+
+
+async def _upload_worker() -> None:
+    while True:
+        batch = [await _upload_q.get()]
+        # 顺带取出已在队列中的条目，同一用户的多轮对话合并为一次 POST
+        while len(batch) < UPLOAD_BATCH_MAX and not _upload_q.empty():
+            batch.append(_upload_q.get_nowait())
+
+        grouped: dict[str, list[dict]] = {}
+        for user_id, messages in batch:
+            grouped.setdefault(user_id, []).extend(messages)
+        try:
+            for user_id, messages in grouped.items():
+                await upload_memory(user_id=user_id, messages=messages)
+        finally:
+            for _ in batch:
+                _upload_q.task_done()
+
+
+def start_upload_workers() -> None:
+    """启动后台上传 worker（在应用启动时调用）。"""
+    for _ in range(UPLOAD_WORKERS):
+        _upload_workers.append(asyncio.create_task(_upload_worker()))
+
+
+async def stop_upload_workers(timeout: float = 10.0) -> None:
+    """等待队列中剩余对话上传完毕（最多 timeout 秒），然后停止 worker。"""
+    try:
+        await asyncio.wait_for(_upload_q.join(), timeout=timeout)
+    except asyncio.TimeoutError:
+        print(f"[RAG upload] 关闭时仍有 {_upload_q.qsize()} 条对话未上传")
+    for task in _upload_workers:
+        task.cancel()
+    await asyncio.gather(*_upload_workers, return_exceptions=True)
+    _upload_workers.clear()
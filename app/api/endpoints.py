@@ -11,6 +11,7 @@ app/api/endpoints.py
 """
 
 import asyncio
+import binascii
 import time
 from datetime import datetime, timezone
 
@@ -29,6 +30,8 @@ from app.memory.manager import MemoryManager
 from app.memory.profile import ProfileManager
 from app.retrieval.retriever import Retriever
 from app.retrieval.milvus_client import MilvusClient
+from app.retrieval import reranker as reranker_module
+from app.retrieval.embed_cache import close_embed_cache
 
 logger = get_logger(__name__)
 
@@ -221,6 +224,16 @@ async def health_check() -> HealthResponse:
     )
 
 
+# ──────────────────────────────────────────────────────────────
+# 生命周期
+# ──────────────────────────────────────────────────────────────
+
+async def close_services() -> None:
+    """关闭模块级服务单例：关闭重排服务连接池与向量缓存（在应用关闭时调用）。"""
+    await reranker_module.close()
+    close_embed_cache()
+
+
 # ──────────────────────────────────────────────────────────────
 # 内部辅助函数
 # ──────────────────────────────────────────────────────────────
@@ -306,14 +319,11 @@ def _decode_base64_files(encoded_files: list[str]) -> list[str]:
     Returns:
         解码后的文本字符串列表。
     """
-    import base64
-
     results: list[str] = []
     for idx, encoded in enumerate(encoded_files):
         try:
-            decoded_bytes = base64.b64decode(encoded)
-            text = decoded_bytes.decode("utf-8", errors="replace")
-            results.append(text)
-        except Exception as e:
+            # 直接调用 C 实现的 a2b_base64，跳过 base64 模块的参数归一化层
+            results.append(binascii.a2b_base64(encoded).decode("utf-8", "replace"))
+        except (binascii.Error, ValueError) as e:
             logger.warning("Base64 文件解码失败 | index={} | error={}", idx, e)
     return results
@@ -3,8 +3,10 @@ app/core/config.py
 ==================
 全局配置模块：读取 .env 环境变量并通过 Pydantic Settings 进行类型校验。
 所有模块均应从此处导入 `settings` 单例，禁止直接 os.getenv 散落各处。
+热路径模块可改用只读快照 `settings_fast`（slots 冻结 dataclass，属性读取更快）。
 """
 
+from dataclasses import make_dataclass
 from functools import lru_cache
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -28,6 +30,9 @@ class Settings(BaseSettings):
     my_model: str = "deepseek-v3-thinking"
     my_emb_model: str = "bge-m3"
     my_embedding_model: str = "bge-m3"
+    embed_batch_size: int = 32        # 单次 Embedding 请求的最大文本数
+    embed_max_concurrency: int = 8    # 批量向量化时同时在途的最大请求数
+    embed_cache_enabled: bool = True  # 启用持久化向量缓存（data_dir/embed_cache.sqlite3）
 
     # ── Milvus ───────────────────────────────────────────────
     milvus_host: str = "localhost"
@@ -37,6 +42,11 @@ class Settings(BaseSettings):
 
     # ── Reranker ─────────────────────────────────────────────
     reranker_url: str = "http://localhost:8080/rerank"
+    reranker_cb_failures: int = 3        # 连续失败多少次后熔断本地重排
+    reranker_cb_cooldown: float = 30.0   # 熔断持续时间（秒），期间直接降级到 Embedding 重排
+    rerank_speculative: bool = False     # 同时发起 Level 1/2 重排并采用先返回者（后端负载翻倍）
+    rerank_cache_enabled: bool = True    # 缓存本地重排结果（相同 query 与候选时直接复用）
+    rerank_skip_margin: int = 0          # 候选数 <= rerank_top_n + 该值时跳过重排
 
     # ── 记忆管理 ─────────────────────────────────────────────
     memory_window_size: int = 10          # 滑动窗口保留的对话轮数
@@ -73,3 +83,12 @@ def get_settings() -> Settings:
 
 # 模块级单例，供其他模块直接 `from app.core.config import settings` 使用
 settings = get_settings()
+
+# 启动时生成的只读快照：字段与 Settings 一致，属性读取为 slot 访问，不经过 Pydantic 描述符
+_SettingsFrozen = make_dataclass(
+    "_SettingsFrozen",
+    [(name, field.annotation) for name, field in Settings.model_fields.items()],
+    frozen=True,
+    slots=True,
+)
+settings_fast = _SettingsFrozen(**settings.model_dump())
@@ -10,7 +10,7 @@ app/core/exceptions.py
 """
 
 from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from loguru import logger
 
 
@@ -114,7 +114,7 @@ def register_exception_handlers(app: FastAPI) -> None:
     """
 
     @app.exception_handler(RAGMemoryException)
-    async def rag_exception_handler(request: Request, exc: RAGMemoryException) -> JSONResponse:
+    async def rag_exception_handler(request: Request, exc: RAGMemoryException) -> ORJSONResponse:
         """处理所有 RAGMemoryException 及其子类。"""
         logger.warning(
             "业务异常 [{}] {} | 路径: {} | 详情: {}",
@@ -123,7 +123,7 @@ def register_exception_handlers(app: FastAPI) -> None:
             request.url.path,
             exc.detail,
         )
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=exc.status_code,
             content={
                 "success": False,
@@ -133,10 +133,10 @@ def register_exception_handlers(app: FastAPI) -> None:
         )
 
     @app.exception_handler(Exception)
-    async def generic_exception_handler(request: Request, exc: Exception) -> JSONResponse:
+    async def generic_exception_handler(request: Request, exc: Exception) -> ORJSONResponse:
         """兜底处理所有未捕获的内部异常，防止内部细节泄露给客户端。"""
         logger.exception("未预期的内部错误 | 路径: {} | 异常: {}", request.url.path, str(exc))
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={
                 "success": False,
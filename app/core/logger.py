@@ -4,24 +4,34 @@ app/core/logger.py
 双层日志配置模块：
   - 层 1（系统日志）：写入 logs/system/system.log，记录运行时事件与错误。
   - 层 2（对话日志）：写入 logs/conversations/{user_id}_YYYY-MM-DD.md，
-                      记录每用户每天的对话明细，便于审计与追溯。
+                      记录每用户每天的对话明细，便于审计与追溯；
+                      由后台任务双缓冲批量写入，不阻塞请求。
 
 基于 loguru 实现，简洁且支持结构化。
 """
 
+import asyncio
 import os
 import sys
+import threading
 from datetime import datetime
 from pathlib import Path
+from typing import Dict, Final, List, Optional, Tuple
+
 from loguru import logger as _logger
 
-from app.core.config import settings
+from app.core.config import settings_fast as settings
+
+# 日志目录在导入时解析一次，避免每条日志重复构造 Path 与读取 settings 属性
+_LOG_DIR: Final[str] = settings.log_dir
+_SYSTEM_DIR: Final[Path] = Path(_LOG_DIR, "system")
+_CONV_DIR: Final[Path] = Path(_LOG_DIR, "conversations")
 
 
 def _ensure_dirs() -> None:
     """确保日志目录存在，不存在则创建。"""
-    Path(settings.log_dir, "system").mkdir(parents=True, exist_ok=True)
-    Path(settings.log_dir, "conversations").mkdir(parents=True, exist_ok=True)
+    _SYSTEM_DIR.mkdir(parents=True, exist_ok=True)
+    _CONV_DIR.mkdir(parents=True, exist_ok=True)
 
 
 def setup_logging() -> None:
@@ -45,11 +55,11 @@ def setup_logging() -> None:
             "<level>{message}</level>"
         ),
         colorize=True,
-        enqueue=True,  # 异步写入，避免阻塞主线程
+        enqueue=False,  # 终端输出本身足够快，同步写入省去每条日志的 pickle 与队列往返
     )
 
     # ── Sink 2：系统日志文件（按天轮转，保留 30 天）───────────
-    system_log_path = Path(settings.log_dir, "system", "system.log")
+    system_log_path = _SYSTEM_DIR / "system.log"
     _logger.add(
         str(system_log_path),
         level="INFO",
@@ -66,15 +76,33 @@ def setup_logging() -> None:
 
 def get_logger(name: str):
     """
-    获取携带模块名称标签的 logger 实例。
+    获取 logger 实例。
+
+    loguru 会从调用栈自动解析 {name}，无需额外 bind 模块名；
+    直接返回全局 logger，避免每条日志合并 extra 字典。
 
     Args:
-        name: 模块名，通常传入 __name__。
+        name: 模块名，通常传入 __name__（保留参数以兼容现有调用）。
 
     Returns:
-        loguru logger 绑定实例。
+        loguru 全局 logger 实例。
     """
-    return _logger.bind(module=name)
+    return _logger
+
+
+# ──────────────────────────────────────────────────────────────
+# 对话日志双缓冲写入
+# 请求侧只把格式化好的条目追加到内存缓冲区；后台任务每个周期交换缓冲区，
+# 按文件分组后每个文件只做一次 open/write，磁盘 I/O 不再出现在请求路径上。
+# log_conversation 以同步 BackgroundTask 形式在线程池中执行，故缓冲区用线程锁保护。
+# ──────────────────────────────────────────────────────────────
+
+_CONV_FLUSH_INTERVAL = 0.1  # 秒
+
+# (日志文件, 当天文件标题, 条目正文)
+_conv_buffer: List[Tuple[Path, str, str]] = []
+_conv_buffer_lock = threading.Lock()
+_conv_writer_task: Optional[asyncio.Task] = None
 
 
 def log_conversation(user_id: str, role: str, content: str) -> None:
@@ -82,22 +110,78 @@ def log_conversation(user_id: str, role: str, content: str) -> None:
     将单条对话消息追加写入对应用户的每日对话日志文件。
 
     日志文件路径格式：logs/conversations/{user_id}_YYYY-MM-DD.md
+    后台写入任务运行时仅放入内存缓冲区，由其批量落盘；否则直接同步写入。
 
     Args:
         user_id: 用户唯一标识符。
         role:    消息角色，如 "user" 或 "assistant"。
         content: 消息文本内容。
     """
-    today = datetime.now().strftime("%Y-%m-%d")
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    log_file = Path(settings.log_dir, "conversations", f"{user_id}_{today}.md")
-
-    # 首次写入当天文件时，添加 Markdown 标题
-    is_new = not log_file.exists()
-    with open(log_file, "a", encoding="utf-8") as f:
-        if is_new:
-            f.write(f"# 对话日志 | 用户: {user_id} | 日期: {today}\n\n")
-        f.write(f"**[{timestamp}] {role.upper()}**\n\n{content}\n\n---\n\n")
+    now = datetime.now()
+    today = now.strftime("%Y-%m-%d")
+    timestamp = now.strftime("%H:%M:%S")
+    log_file = _CONV_DIR / f"{user_id}_{today}.md"
+    header = f"# 对话日志 | 用户: {user_id} | 日期: {today}\n\n"
+    entry = f"**[{timestamp}] {role.upper()}**\n\n{content}\n\n---\n\n"
+
+    with _conv_buffer_lock:
+        if _conv_writer_task is not None:
+            _conv_buffer.append((log_file, header, entry))
+            return
+    _write_conversation_entries([(log_file, header, entry)])
+
+
+def _write_conversation_entries(entries: List[Tuple[Path, str, str]]) -> None:
+    """按文件分组，每个文件一次追加写入；首次写入当天文件时添加 Markdown 标题。"""
+    grouped: Dict[Path, Tuple[str, List[str]]] = {}
+    for log_file, header, entry in entries:
+        grouped.setdefault(log_file, (header, []))[1].append(entry)
+
+    for log_file, (header, bodies) in grouped.items():
+        is_new = not log_file.exists()
+        with open(log_file, "a", encoding="utf-8") as f:
+            f.write((header if is_new else "") + "".join(bodies))
+
+
+def _swap_conversation_buffer() -> List[Tuple[Path, str, str]]:
+    """取出当前缓冲区内容并换上一个空缓冲区。"""
+    global _conv_buffer
+    with _conv_buffer_lock:
+        batch, _conv_buffer = _conv_buffer, []
+    return batch
+
+
+async def _conversation_writer() -> None:
+    while True:
+        await asyncio.sleep(_CONV_FLUSH_INTERVAL)
+        batch = _swap_conversation_buffer()
+        if not batch:
+            continue
+        try:
+            await asyncio.to_thread(_write_conversation_entries, batch)
+        except Exception as e:
+            _logger.error("对话日志写入失败 | entries={} | error={}", len(batch), e)
+
+
+def start_conversation_writer() -> None:
+    """启动对话日志后台写入任务（在应用启动时调用）。"""
+    global _conv_writer_task
+    with _conv_buffer_lock:
+        if _conv_writer_task is None:
+            _conv_writer_task = asyncio.create_task(_conversation_writer())
+
+
+async def stop_conversation_writer() -> None:
+    """停止后台写入任务，并将缓冲区中剩余的条目写入磁盘（在应用关闭时调用）。"""
+    global _conv_writer_task
+    with _conv_buffer_lock:
+        task, _conv_writer_task = _conv_writer_task, None
+    if task is not None:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    batch = _swap_conversation_buffer()
+    if batch:
+        await asyncio.to_thread(_write_conversation_entries, batch)
 
 
 # 模块初始化时对外暴露的 logger 实例
@@ -3,9 +3,10 @@ app/llm/client.py
 =================
 模型网关层：大语言模型客户端统一初始化与调用入口。
 
-提供两种客户端：
-  - client  (openai.OpenAI)      : 底层 OpenAI SDK，适合精细控制与流式输出。
-  - llm     (langchain ChatOpenAI): LangChain 封装，适合链式调用与结构化输出。
+提供以下客户端：
+  - client       (openai.OpenAI)      : 底层同步 OpenAI SDK，供 call_llm_sync 等同步场景使用。
+  - async_client (openai.AsyncOpenAI) : 底层异步 OpenAI SDK，供 call_llm_async 在事件循环内直接调用。
+  - llm          (langchain ChatOpenAI): LangChain 封装，适合链式调用与结构化输出（首次访问时才创建）。
 
 ⚠️ 严格遵循规范：必须读取 .env 中的自定义配置，不使用 OpenAI 默认地址。
 """
@@ -13,11 +14,16 @@ app/llm/client.py
 import os
 from typing import List, Optional
 
-from langchain_openai import ChatOpenAI
-from openai import OpenAI
-from tenacity import retry, stop_after_attempt, wait_exponential
+import openai
+from openai import AsyncOpenAI, OpenAI
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_random_exponential,
+)
 
-from app.core.config import settings
+from app.core.config import settings_fast as settings
 from app.core.exceptions import LLMClientError
 from app.core.logger import get_logger
 
@@ -39,24 +45,49 @@ client: OpenAI = OpenAI(
     base_url=API_BASE_URL,
 )
 
-# LangChain 封装客户端：适用于链式调用、结构化输出、LCEL 管道
-llm: ChatOpenAI = ChatOpenAI(
-    model=MODEL_NAME,
+# 异步 OpenAI 客户端：在事件循环内通过 httpx.AsyncClient 发起请求（连接池复用），不占用线程池
+# 重试统一由 call_llm_async 中的 AsyncRetrying 负责，关闭 SDK 内置重试以免叠加
+async_client: AsyncOpenAI = AsyncOpenAI(
     api_key=MY_API_KEY,
     base_url=API_BASE_URL,
-    temperature=0.0,  # 信息提取场景需要确定性输出，温度设为 0
+    max_retries=0,
 )
 
 
+def __getattr__(name: str):
+    """
+    延迟构造 LangChain 封装客户端 llm（PEP 562）。
+
+    llm 适用于链式调用、结构化输出、LCEL 管道；导入 langchain_openai 开销较大，
+    仅在首次访问 client.llm 时导入并创建，之后作为模块全局变量直接命中。
+    """
+    if name == "llm":
+        from langchain_openai import ChatOpenAI
+
+        global llm
+        llm = ChatOpenAI(
+            model=MODEL_NAME,
+            api_key=MY_API_KEY,
+            base_url=API_BASE_URL,
+            temperature=0.0,  # 信息提取场景需要确定性输出，温度设为 0
+        )
+        return llm
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 # ──────────────────────────────────────────────────────────────
 # 通用调用接口（带重试与异常包装）
 # ──────────────────────────────────────────────────────────────
 
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=1, max=10),
-    reraise=False,
+# 仅对瞬时错误（超时、连接失败、限流、5xx）重试；鉴权、参数等 4xx 错误直接失败
+_TRANSIENT_LLM_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
 )
+
+
 async def call_llm_async(
     user_message: str,
     system_message: str = "",
@@ -67,7 +98,7 @@ async def call_llm_async(
     """
     异步调用 LLM 并返回文本响应（封装重试与错误处理）。
 
-    使用底层 OpenAI client 发起调用，适合大多数文本生成场景。
+    使用异步 OpenAI client 发起调用，适合大多数文本生成场景。
 
     Args:
         user_message:   用户消息内容。
@@ -80,11 +111,13 @@ async def call_llm_async(
         LLM 生成的文本字符串。
 
     Raises:
-        LLMClientError: 在所有重试失败后抛出。
+        LLMClientError: 遇到不可重试错误或所有重试失败后抛出。
     """
     target_model = model or MODEL_NAME
     messages: List[dict] = []
 
+    # system 消息原样置于最前：app/prompts 中的系统 Prompt 均为静态常量，动态内容只放在 user 消息里，
+    # 请求前缀逐字节一致，可命中服务商侧的自动前缀缓存（OpenAI 兼容接口无需额外参数）
     if system_message:
         messages.append({"role": "system", "content": system_message})
     messages.append({"role": "user", "content": user_message})
@@ -92,18 +125,20 @@ async def call_llm_async(
     try:
         logger.debug("调用 LLM | model={} | msg_len={}", target_model, len(user_message))
 
-        # 使用同步 client 在线程池中运行（FastAPI 异步环境下的最佳实践）
-        import asyncio
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(
-            None,
-            lambda: client.chat.completions.create(
-                model=target_model,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
-            ),
-        )
+        # 带随机抖动的指数退避，避免服务商限流时大量请求同时重试
+        async for attempt in AsyncRetrying(
+            stop=stop_after_attempt(3),
+            wait=wait_random_exponential(min=1, max=10),
+            retry=retry_if_exception_type(_TRANSIENT_LLM_ERRORS),
+            reraise=True,
+        ):
+            with attempt:
+                response = await async_client.chat.completions.create(
+                    model=target_model,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                )
 
         result = response.choices[0].message.content or ""
         logger.debug("LLM 调用成功 | output_len={}", len(result))
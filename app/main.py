@@ -9,21 +9,32 @@ app/main.py
 """
 
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from pathlib import Path
+from typing import AsyncGenerator, Final
 
+import orjson
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 
-from app.api.endpoints import router
+from app.api.endpoints import close_services, router
 from app.core.config import settings
 from app.core.exceptions import register_exception_handlers
-from app.core.logger import get_logger, setup_logging
+from app.core.logger import (
+    get_logger,
+    setup_logging,
+    start_conversation_writer,
+    stop_conversation_writer,
+)
 
 # 初始化日志系统（必须在所有其他模块之前）
 setup_logging()
 logger = get_logger(__name__)
 
+_DATA_DIR: Final[str] = settings.data_dir
+_LOG_DIR: Final[str] = settings.log_dir
+
 
 # ──────────────────────────────────────────────────────────────
 # 应用生命周期管理
@@ -45,20 +56,14 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     logger.info("  Embed Model  : {}", settings.my_embedding_model)
     logger.info("  Milvus       : {}:{}", settings.milvus_host, settings.milvus_port)
     logger.info("  Reranker URL : {}", settings.reranker_url)
-    logger.info("  Data Dir     : {}", settings.data_dir)
-    logger.info("  Log Dir      : {}", settings.log_dir)
+    logger.info("  Data Dir     : {}", _DATA_DIR)
+    logger.info("  Log Dir      : {}", _LOG_DIR)
     logger.info("=" * 60)
 
-    # 确保数据与日志目录存在
-    import os
-    for path in [
-        settings.data_dir,
-        f"{settings.data_dir}/users",
-        settings.log_dir,
-        f"{settings.log_dir}/system",
-        f"{settings.log_dir}/conversations",
-    ]:
-        os.makedirs(path, exist_ok=True)
+    # 确保数据目录存在：只创建叶子目录，父目录由 parents=True 一并创建（日志目录已由 setup_logging 创建）
+    Path(_DATA_DIR, "users").mkdir(parents=True, exist_ok=True)
+
+    start_conversation_writer()
 
     logger.info("RAG_Memory 服务启动完成，准备接受请求。")
 
@@ -66,6 +71,8 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
 
     # ── Shutdown ─────────────────────────────────────────────
     logger.info("RAG_Memory 服务正在关闭，执行清理任务...")
+    await close_services()
+    await stop_conversation_writer()
     logger.info("RAG_Memory 服务已安全关闭。")
 
 
@@ -87,6 +94,7 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,  # orjson 序列化，替代标准库 json
 )
 
 
@@ -104,27 +112,45 @@ app.add_middleware(
 )
 
 # 请求日志中间件（记录每次请求的基础信息）
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
 from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 import time
 
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    """记录每个 HTTP 请求的方法、路径与响应时间。"""
+class RequestLoggingMiddleware:
+    """
+    记录每个 HTTP 请求的方法、路径与响应时间。
+
+    纯 ASGI 实现：仅包装 send 以捕获响应状态码，不像 BaseHTTPMiddleware
+    那样为每个请求创建任务组与收发队列。
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-    async def dispatch(self, request: Request, call_next) -> Response:
         start = time.monotonic()
-        response = await call_next(request)
+        status_code = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
         elapsed = (time.monotonic() - start) * 1000
         logger.info(
             "{} {} → {} | {:.1f}ms",
-            request.method,
-            request.url.path,
-            response.status_code,
+            scope["method"],
+            scope["path"],
+            status_code,
             elapsed,
         )
-        return response
 
 
 app.add_middleware(RequestLoggingMiddleware)
@@ -145,20 +171,25 @@ register_exception_handlers(app)
 app.include_router(router, prefix="/api/v1", tags=["记忆管理"])
 
 # 健康检查路由（同时在根路径和 /api/v1/health 提供）
-from fastapi.responses import JSONResponse
-
-@app.get("/health", tags=["运维"], summary="根路径健康检查")
-async def root_health() -> JSONResponse:
+# 静态响应体在导入时一次性序列化，请求时直接返回原始 bytes，跳过 jsonable_encoder。
+# 注意：Response 对象本身不能跨请求复用——发送时 message["headers"] 即 raw_headers 列表，
+# CORSMiddleware 等会原地追加响应头，共享实例会导致响应头在请求间累积。
+_HEALTH_BODY = orjson.dumps({"status": "ok", "service": "RAG_Memory", "version": "1.0.0"})
+_ROOT_BODY = orjson.dumps({
+    "service": "RAG_Memory",
+    "version": "1.0.0",
+    "docs": "/docs",
+    "health": "/health",
+})
+
+
+@app.get("/health", response_model=None, tags=["运维"], summary="根路径健康检查")
+async def root_health() -> Response:
     """根路径健康检查，供 Docker HEALTHCHECK 使用。"""
-    return JSONResponse({"status": "ok", "service": "RAG_Memory", "version": "1.0.0"})
+    return Response(content=_HEALTH_BODY, media_type="application/json")
 
 
-@app.get("/", tags=["运维"], summary="服务根路径")
-async def root() -> JSONResponse:
+@app.get("/", response_model=None, tags=["运维"], summary="服务根路径")
+async def root() -> Response:
     """返回服务基础信息。"""
-    return JSONResponse({
-        "service": "RAG_Memory",
-        "version": "1.0.0",
-        "docs": "/docs",
-        "health": "/health",
-    })
+    return Response(content=_ROOT_BODY, media_type="application/json")
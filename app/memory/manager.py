@@ -9,14 +9,17 @@ app/memory/manager.py
   data/users/{user_id}/compressed.md    - 历史摘要文件（压缩后的旧对话记忆）
 """
 
-import json
+import asyncio
+import weakref
+from collections import OrderedDict
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 import aiofiles
+import orjson
 
-from app.core.config import settings
+from app.core.config import settings_fast as settings
 from app.core.logger import get_logger
 from app.prompts.summarization import (
     get_incremental_summarization_system_prompt,
@@ -27,6 +30,15 @@ from app.prompts.summarization import (
 
 logger = get_logger(__name__)
 
+# 历史条目缓存与路径缓存的容量（LRU，按用户数计）
+HISTORY_CACHE_SIZE = 1024
+
+
+def _write_bytes(path: Path, data: bytes, mode: str = "ab") -> None:
+    """同步写入字节（供线程池调用），默认追加模式。"""
+    with open(path, mode) as f:
+        f.write(data)
+
 
 class MemoryManager:
     """
@@ -43,6 +55,13 @@ class MemoryManager:
         self._window_size = settings.memory_window_size
         self._compress_threshold = settings.memory_compress_threshold
         self._base_dir.mkdir(parents=True, exist_ok=True)
+        # user_id → (history.jsonl 字节数, 全部条目)：文件大小变化（如其他 worker 进程写入）时自动失效；
+        # LRU，最多保留 HISTORY_CACHE_SIZE 个用户
+        self._cache: "OrderedDict[str, Tuple[int, List[dict]]]" = OrderedDict()
+        # user_id → 锁：串行化同一用户的 追加 / 压缩；弱引用，无人持有或等待时自动回收
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        # user_id → (history.jsonl, compressed.md)：用户目录只在首次访问（或被淘汰后再次访问）时 mkdir
+        self._path_cache: "OrderedDict[str, Tuple[Path, Path]]" = OrderedDict()
         logger.info(
             "MemoryManager 初始化 | window_size={} | compress_threshold={}",
             self._window_size, self._compress_threshold,
@@ -50,17 +69,27 @@ class MemoryManager:
 
     # ── 路径辅助 ────────────────────────────────────────────
 
+    def _paths(self, user_id: str) -> Tuple[Path, Path]:
+        """返回 (history.jsonl, compressed.md) 路径；首次访问时创建用户目录并缓存。"""
+        paths = self._path_cache.get(user_id)
+        if paths is None:
+            user_dir = self._base_dir / user_id
+            user_dir.mkdir(parents=True, exist_ok=True)
+            paths = (user_dir / "history.jsonl", user_dir / "compressed.md")
+            self._path_cache[user_id] = paths
+            if len(self._path_cache) > HISTORY_CACHE_SIZE:
+                self._path_cache.popitem(last=False)
+        else:
+            self._path_cache.move_to_end(user_id)
+        return paths
+
     def _history_path(self, user_id: str) -> Path:
         """返回用户对话历史文件路径（JSONL 格式）。"""
-        user_dir = self._base_dir / user_id
-        user_dir.mkdir(parents=True, exist_ok=True)
-        return user_dir / "history.jsonl"
+        return self._paths(user_id)[0]
 
     def _compressed_path(self, user_id: str) -> Path:
         """返回用户历史摘要文件路径。"""
-        user_dir = self._base_dir / user_id
-        user_dir.mkdir(parents=True, exist_ok=True)
-        return user_dir / "compressed.md"
+        return self._paths(user_id)[1]
 
     # ── 核心公共方法 ─────────────────────────────────────────
 
@@ -79,17 +108,31 @@ class MemoryManager:
             for text in new_texts
         ]
 
-        # 追加写入 history.jsonl
-        await self._append_history(user_id, entries)
+        lock = self._locks.get(user_id)
+        if lock is None:
+            lock = self._locks[user_id] = asyncio.Lock()
 
-        # 检查是否需要压缩
-        all_history = await self._read_all_history(user_id)
-        if len(all_history) >= self._compress_threshold:
-            logger.info(
-                "历史消息数 {} >= 阈值 {}，触发压缩 | user_id={}",
-                len(all_history), self._compress_threshold, user_id,
-            )
-            await self._compress(user_id, all_history)
+        async with lock:
+            all_history = await self._load_history(user_id)
+            size_before = self._cache[user_id][0]
+
+            # 追加写入 history.jsonl，并同步更新内存缓存
+            written = await self._append_history(user_id, entries)
+            if written and self._history_size(user_id) == size_before + written:
+                all_history.extend(entries)
+                self._cache_put(user_id, size_before + written, all_history)
+            else:
+                # 写入失败或文件被其他进程改动：以磁盘为准重新加载
+                self._cache.pop(user_id, None)
+                all_history = await self._load_history(user_id)
+
+            # 检查是否需要压缩
+            if len(all_history) >= self._compress_threshold:
+                logger.info(
+                    "历史消息数 {} >= 阈值 {}，触发压缩 | user_id={}",
+                    len(all_history), self._compress_threshold, user_id,
+                )
+                await self._compress(user_id, all_history)
 
     async def get_recent_history(self, user_id: str) -> List[str]:
         """
@@ -101,7 +144,7 @@ class MemoryManager:
         Returns:
             最近 MEMORY_WINDOW_SIZE 条消息的文本列表，按时间升序排列。
         """
-        all_history = await self._read_all_history(user_id)
+        all_history = await self._load_history(user_id)
         recent = all_history[-self._window_size:]
         return [entry["text"] for entry in recent]
 
@@ -127,15 +170,49 @@ class MemoryManager:
 
     # ── 内部方法 ─────────────────────────────────────────────
 
-    async def _append_history(self, user_id: str, entries: List[dict]) -> None:
-        """以追加模式将消息条目写入 history.jsonl。"""
+    def _history_size(self, user_id: str) -> int:
+        """返回 history.jsonl 当前字节数，文件不存在时为 0。"""
+        try:
+            return self._history_path(user_id).stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    async def _load_history(self, user_id: str) -> List[dict]:
+        """
+        返回用户全部历史条目：文件大小与缓存一致时直接使用内存缓存，否则从磁盘重新读取。
+        """
+        size = self._history_size(user_id)
+        cached = self._cache.get(user_id)
+        if cached is not None and cached[0] == size:
+            self._cache.move_to_end(user_id)
+            return cached[1]
+        entries = await self._read_all_history(user_id)
+        self._cache_put(user_id, size, entries)
+        return entries
+
+    def _cache_put(self, user_id: str, size: int, entries: List[dict]) -> None:
+        self._cache[user_id] = (size, entries)
+        self._cache.move_to_end(user_id)
+        if len(self._cache) > HISTORY_CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    async def _append_history(self, user_id: str, entries: List[dict]) -> int:
+        """
+        以追加模式将消息条目写入 history.jsonl。
+        所有条目经 orjson 序列化后拼成一个 bytes，在线程池中一次 open/write/close 完成，避免逐行 await。
+
+        Returns:
+            写入的字节数；失败时返回 0。
+        """
         history_path = self._history_path(user_id)
+        payload = b"".join(orjson.dumps(entry) + b"\n" for entry in entries)
         try:
-            async with aiofiles.open(history_path, "a", encoding="utf-8") as f:
-                for entry in entries:
-                    await f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, _write_bytes, history_path, payload)
+            return len(payload)
         except Exception as e:
             logger.error("追加历史记录失败 | user_id={} | error={}", user_id, e)
+            return 0
 
     async def _read_all_history(self, user_id: str) -> List[dict]:
         """读取 history.jsonl 中的所有条目。"""
@@ -145,16 +222,20 @@ class MemoryManager:
 
         entries: List[dict] = []
         try:
-            async with aiofiles.open(history_path, "r", encoding="utf-8") as f:
-                async for line in f:
-                    line = line.strip()
-                    if line:
-                        try:
-                            entries.append(json.loads(line))
-                        except json.JSONDecodeError:
-                            logger.warning("JSONL 行解析失败，跳过 | user_id={}", user_id)
+            # 一次线程池调用读入整个文件，再在事件循环内逐行解析，避免逐行的线程往返
+            loop = asyncio.get_running_loop()
+            data = await loop.run_in_executor(None, history_path.read_bytes)
         except Exception as e:
             logger.error("读取历史记录失败 | user_id={} | error={}", user_id, e)
+            return entries
+
+        for line in data.splitlines():
+            if not line.strip():
+                continue
+            try:
+                entries.append(orjson.loads(line))
+            except orjson.JSONDecodeError:
+                logger.warning("JSONL 行解析失败，跳过 | user_id={}", user_id)
 
         return entries
 
@@ -218,12 +299,14 @@ class MemoryManager:
         # 重置 history.jsonl，仅保留最近 WINDOW_SIZE 条
         history_path = self._history_path(user_id)
         try:
-            async with aiofiles.open(history_path, "w", encoding="utf-8") as f:
-                for entry in recent_entries:
-                    await f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            payload = b"".join(orjson.dumps(entry) + b"\n" for entry in recent_entries)
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, _write_bytes, history_path, payload, "wb")
+            self._cache_put(user_id, self._history_size(user_id), list(recent_entries))
             logger.info(
                 "历史记录压缩完成，保留最近 {} 条 | user_id={}",
                 len(recent_entries), user_id,
             )
         except Exception as e:
+            self._cache.pop(user_id, None)
             logger.error("重写 history.jsonl 失败 | user_id={} | error={}", user_id, e)
@@ -6,29 +6,47 @@ app/memory/profile.py
 文件路径规则：data/users/{user_id}/user.md
 职责：
   - read_profile()                 : 异步读取用户画像文件内容。
-  - write_profile()                : 异步将新画像内容写入文件。
+  - write_profile()                : 异步写入（覆盖）用户画像文件。
   - extract_and_update_profile()   : 调用 LLM 从对话中提取信息并合并至画像（后台任务）。
 """
 
 import asyncio
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional
-
-import aiofiles
+from typing import Optional, Tuple
 
 from app.core.config import settings
 from app.core.exceptions import UserProfileError
 from app.core.logger import get_logger
 from app.prompts.extraction import (
+    get_extract_and_merge_system_prompt,
+    get_extract_and_merge_user_prompt,
     get_extraction_system_prompt,
     get_extraction_user_prompt,
-    get_merge_system_prompt,
-    get_merge_user_prompt,
 )
 
 logger = get_logger(__name__)
 
 
+def _file_version(path: Path) -> Optional[Tuple[int, int]]:
+    """返回文件的 (mtime_ns, size) 作为版本标识；文件不存在时返回 None。"""
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _write_text(path: Path, content: str) -> Optional[Tuple[int, int]]:
+    """同步写入文本并返回写入后的文件版本（供线程池调用）。"""
+    path.write_text(content, encoding="utf-8")
+    return _file_version(path)
+
+
+# 画像读缓存容量（LRU，按用户数计）
+PROFILE_CACHE_SIZE = 1024
+
+
 class ProfileManager:
     """
     用户画像管理器。
@@ -40,6 +58,8 @@ class ProfileManager:
     def __init__(self) -> None:
         self._base_dir = Path(settings.data_dir) / "users"
         self._base_dir.mkdir(parents=True, exist_ok=True)
+        # 读缓存：user_id → ((mtime_ns, size), 内容)；文件版本变化（如其他 worker 写入）时自动失效
+        self._cache: "OrderedDict[str, Tuple[Tuple[int, int], str]]" = OrderedDict()
         logger.info("ProfileManager 初始化 | base_dir={}", self._base_dir)
 
     def _get_profile_path(self, user_id: str) -> Path:
@@ -68,13 +88,21 @@ class ProfileManager:
         """
         profile_path = self._get_profile_path(user_id)
 
-        if not profile_path.exists():
+        version = _file_version(profile_path)
+        if version is None:
+            self._cache.pop(user_id, None)
             logger.debug("用户画像不存在，返回空内容 | user_id={}", user_id)
             return ""
 
+        cached = self._cache.get(user_id)
+        if cached is not None and cached[0] == version:
+            self._cache.move_to_end(user_id)
+            return cached[1]
+
         try:
-            async with aiofiles.open(profile_path, "r", encoding="utf-8") as f:
-                content = await f.read()
+            # 一次线程池调用完成 open/read/close，而不是 aiofiles 的逐步线程往返
+            content = await asyncio.to_thread(profile_path.read_text, encoding="utf-8")
+            self._cache_put(user_id, version, content)
             logger.debug("读取用户画像成功 | user_id={} | len={}", user_id, len(content))
             return content
         except Exception as e:
@@ -92,12 +120,19 @@ class ProfileManager:
         profile_path = self._get_profile_path(user_id)
 
         try:
-            async with aiofiles.open(profile_path, "w", encoding="utf-8") as f:
-                await f.write(content)
-            logger.info("用户画像已更新 | user_id={} | len={}", user_id, len(content))
+            version = await asyncio.to_thread(_write_text, profile_path, content)
         except Exception as e:
             logger.error("写入用户画像失败 | user_id={} | error={}", user_id, e)
             raise UserProfileError(detail=f"写入 user.md 失败: {e}")
+        if version is not None:
+            self._cache_put(user_id, version, content)
+        logger.info("用户画像已更新 | user_id={} | len={}", user_id, len(content))
+
+    def _cache_put(self, user_id: str, version: Tuple[int, int], content: str) -> None:
+        self._cache[user_id] = (version, content)
+        self._cache.move_to_end(user_id)
+        if len(self._cache) > PROFILE_CACHE_SIZE:
+            self._cache.popitem(last=False)
 
     async def extract_and_update_profile(
         self, user_id: str, conversation_text: str
@@ -105,6 +140,7 @@ class ProfileManager:
         """
         【后台异步任务】
         调用 LLM 从对话内容中提取用户信息，并与现有画像合并后写回文件。
+        已有画像时提取与合并由同一次 LLM 调用完成；首次建立画像时仅做提取。
 
         此方法设计为 FastAPI BackgroundTask，执行失败不会影响主请求响应。
 
@@ -121,36 +157,38 @@ class ProfileManager:
             # Step 1: 读取现有画像
             existing_profile = await self.read_profile(user_id)
 
-            # Step 2: 调用 LLM 提取新信息
-            extraction_result = await call_llm_async(
-                user_message=get_extraction_user_prompt(
-                    conversation_text=conversation_text,
-                    existing_profile=existing_profile,
-                ),
-                system_message=get_extraction_system_prompt(),
-                max_tokens=1024,
-            )
-
-            # 若 LLM 返回无新信息的提示，跳过合并步骤
-            if "无新增用户信息" in extraction_result or not extraction_result.strip():
-                logger.info("本次对话无新增用户信息，跳过画像更新 | user_id={}", user_id)
-                return
-
-            logger.debug("LLM 提取结果 | user_id={} | extracted_len={}", user_id, len(extraction_result))
-
-            # Step 3: 若已有画像，调用 LLM 合并；若无则直接使用提取结果
+            # Step 2: 调用 LLM 生成新画像（已有画像时提取与合并一次完成，省去一次 LLM 往返）
             if existing_profile.strip():
-                merged_profile = await call_llm_async(
-                    user_message=get_merge_user_prompt(
+                llm_result = await call_llm_async(
+                    user_message=get_extract_and_merge_user_prompt(
                         existing_profile=existing_profile,
-                        new_info=extraction_result,
+                        conversation_text=conversation_text,
                     ),
-                    system_message=get_merge_system_prompt(),
+                    system_message=get_extract_and_merge_system_prompt(),
                     max_tokens=2048,
                 )
             else:
-                # 首次建立画像，无需合并
-                merged_profile = f"# 用户画像\n\n{extraction_result}"
+                llm_result = await call_llm_async(
+                    user_message=get_extraction_user_prompt(
+                        conversation_text=conversation_text,
+                        existing_profile=existing_profile,
+                    ),
+                    system_message=get_extraction_system_prompt(),
+                    max_tokens=1024,
+                )
+
+            # 若 LLM 返回无新信息的提示，跳过画像更新
+            if "无新增用户信息" in llm_result or not llm_result.strip():
+                logger.info("本次对话无新增用户信息，跳过画像更新 | user_id={}", user_id)
+                return
+
+            logger.debug("LLM 画像结果 | user_id={} | result_len={}", user_id, len(llm_result))
+
+            # Step 3: 已有画像时结果即为合并后的完整画像；首次建立画像时补充标题
+            if existing_profile.strip():
+                merged_profile = llm_result
+            else:
+                merged_profile = f"# 用户画像\n\n{llm_result}"
 
             # Step 4: 写回文件
             await self.write_profile(user_id=user_id, content=merged_profile)
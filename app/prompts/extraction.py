@@ -5,13 +5,12 @@ app/prompts/extraction.py
 
 【解耦原则】
   - 本文件只存放 Prompt 字符串模板，不包含任何业务逻辑。
+  - 系统 Prompt 为静态常量，动态内容（画像、对话、摘要）只放入用户 Prompt，
+    保证请求前缀不变，以便命中 LLM 服务商的前缀缓存。
   - 业务代码（profile.py）通过调用本模块的函数获取格式化后的 Prompt。
   - 修改提示词策略时只需修改本文件，不影响业务代码。
 """
 
-from string import Template
-
-
 # ──────────────────────────────────────────────────────────────
 # 系统 Prompt：设定 LLM 角色与行为约束
 # ──────────────────────────────────────────────────────────────
@@ -37,51 +36,56 @@ EXTRACTION_SYSTEM_PROMPT = """你是一个专业的用户信息分析助手。
 """
 
 # ──────────────────────────────────────────────────────────────
-# 用户 Prompt 模板（使用 Python 标准库 string.Template）
-# 占位符：$conversation_text, $existing_profile
+# 用户 Prompt 模板（str.format 格式串，占位符在模块加载时即已确定）
+# 占位符：{conversation_text}, {existing_profile}
 # ──────────────────────────────────────────────────────────────
 
-_EXTRACTION_USER_TEMPLATE = Template(
-    """请从以下对话内容中提取用户信息。
+_EXTRACTION_USER_FMT = """请从以下对话内容中提取用户信息。
 
 ===== 当前已有用户画像 =====
-$existing_profile
+{existing_profile}
 
 ===== 本次对话内容 =====
-$conversation_text
+{conversation_text}
 
 ===== 提取要求 =====
 请仅提取【新增或需要更新】的信息条目，避免与已有画像重复。
 以 Markdown 格式直接输出提取结果，无需任何前言或解释。
 """
-)
 
 # ──────────────────────────────────────────────────────────────
-# 合并已有画像与新提取信息的 Prompt
+# 提取 + 合并一步完成的 Prompt（已有画像时使用，只需一次 LLM 调用）
+# 占位符：{existing_profile}, {conversation_text}
 # ──────────────────────────────────────────────────────────────
 
-_MERGE_SYSTEM_PROMPT = """你是一个用户画像整合助手。
-你的任务是将【已有用户画像】与【新提取的用户信息】合并为一份更完整、无重复的用户画像。
+_EXTRACT_AND_MERGE_SYSTEM_PROMPT = """你是一个专业的用户画像维护助手。
+你的任务是从用户的对话内容中提取与该用户相关的个人信息、偏好、背景和重要事实，
+并直接将其整合进【已有用户画像】，输出更新后的完整画像。
+
+【提取规则】
+1. 只提取对话中明确出现或可被高置信度推断的信息，不要捏造或过度推断。
+2. 信息要简洁、客观，避免冗余描述。
+3. 如果对话中完全没有新增或需要更新的个人信息，仅输出：`（本次对话无新增用户信息）`
 
 【合并规则】
-1. 以 Markdown 格式输出最终画像，使用二级标题（##）组织类别。
+1. 以 Markdown 格式输出最终画像，使用二级标题（##）组织类别，条目用 `-` 列举。
 2. 若新信息与已有信息冲突，优先采用新信息并注明更新。
-3. 去除重复条目，保持画像简洁。
+3. 去除重复条目，保持画像简洁；若某类别无有效信息，则完全省略该类别。
 4. 直接输出合并后的完整画像内容，不需要解释或前言。
 """
 
-_MERGE_USER_TEMPLATE = Template(
-    """请将以下两部分信息合并为一份完整的用户画像：
+_EXTRACT_AND_MERGE_USER_FMT = """请根据本次对话内容更新用户画像。
 
 ===== 已有用户画像 =====
-$existing_profile
+{existing_profile}
 
-===== 新提取的用户信息 =====
-$new_info
+===== 本次对话内容 =====
+{conversation_text}
 
-请直接输出合并后的完整 Markdown 格式用户画像：
+===== 输出要求 =====
+若有新增或需要更新的信息，请直接输出合并后的完整 Markdown 格式用户画像；
+否则仅输出：（本次对话无新增用户信息）
 """
-)
 
 
 # ──────────────────────────────────────────────────────────────
@@ -112,34 +116,34 @@ def get_extraction_user_prompt(
     Returns:
         格式化后的用户 Prompt 字符串。
     """
-    return _EXTRACTION_USER_TEMPLATE.substitute(
+    return _EXTRACTION_USER_FMT.format(
         conversation_text=conversation_text.strip(),
         existing_profile=existing_profile.strip() or "（暂无历史画像）",
     )
 
 
-def get_merge_system_prompt() -> str:
+def get_extract_and_merge_system_prompt() -> str:
     """
-    返回画像合并任务的系统 Prompt。
+    返回“提取 + 合并”一步完成任务的系统 Prompt。
 
     Returns:
         系统 Prompt 字符串。
     """
-    return _MERGE_SYSTEM_PROMPT
+    return _EXTRACT_AND_MERGE_SYSTEM_PROMPT
 
 
-def get_merge_user_prompt(existing_profile: str, new_info: str) -> str:
+def get_extract_and_merge_user_prompt(existing_profile: str, conversation_text: str) -> str:
     """
-    生成画像合并任务的用户 Prompt。
+    生成“提取 + 合并”一步完成任务的用户 Prompt。
 
     Args:
-        existing_profile: 当前 user.md 内容。
-        new_info:         本次提取到的新用户信息。
+        existing_profile:  当前 user.md 内容。
+        conversation_text: 本轮对话的完整文本。
 
     Returns:
-        格式化后的合并 Prompt 字符串。
+        格式化后的用户 Prompt 字符串。
     """
-    return _MERGE_USER_TEMPLATE.substitute(
+    return _EXTRACT_AND_MERGE_USER_FMT.format(
         existing_profile=existing_profile.strip() or "（暂无历史画像）",
-        new_info=new_info.strip() or "（无新信息）",
+        conversation_text=conversation_text.strip(),
     )
@@ -5,13 +5,12 @@ app/prompts/summarization.py
 
 【解耦原则】
   - 本文件只存放 Prompt 字符串模板，不包含任何业务逻辑。
+  - 系统 Prompt 为静态常量，动态内容（画像、对话、摘要）只放入用户 Prompt，
+    保证请求前缀不变，以便命中 LLM 服务商的前缀缓存。
   - 业务代码（memory/manager.py）通过调用本模块的函数获取格式化后的 Prompt。
   - 修改摘要策略时只需修改本文件，不影响业务代码。
 """
 
-from string import Template
-
-
 # ──────────────────────────────────────────────────────────────
 # 对话历史压缩摘要 Prompt
 # ──────────────────────────────────────────────────────────────
@@ -29,19 +28,17 @@ SUMMARIZATION_SYSTEM_PROMPT = """你是一个专业的对话历史整理助手
 6. 直接输出摘要内容，不要包含任何前言、解释或标注。
 """
 
-_SUMMARIZATION_USER_TEMPLATE = Template(
-    """请将以下多轮对话历史压缩为一份简洁的记忆摘要：
+_SUMMARIZATION_USER_FMT = """请将以下多轮对话历史压缩为一份简洁的记忆摘要：
 
 ===== 待压缩的对话历史 =====
-$conversation_history
+{conversation_history}
 
 ===== 输出要求 =====
 - 以流畅的段落形式输出摘要
 - 重点保留：用户意图、关键决策、项目进展、重要事实
-- 摘要长度目标：约 $target_length 字
+- 摘要长度目标：约 {target_length} 字
 - 直接输出摘要，无需任何前言
 """
-)
 
 # ──────────────────────────────────────────────────────────────
 # 增量摘要合并 Prompt（将旧摘要与新对话合并为新摘要）
@@ -59,21 +56,19 @@ _INCREMENTAL_SUMMARIZATION_SYSTEM_PROMPT = """你是一个对话记忆管理助
 5. 直接输出整合后的摘要，无需前言。
 """
 
-_INCREMENTAL_SUMMARIZATION_USER_TEMPLATE = Template(
-    """请将以下已有摘要与新对话内容整合为一份更新后的摘要：
+_INCREMENTAL_SUMMARIZATION_USER_FMT = """请将以下已有摘要与新对话内容整合为一份更新后的摘要：
 
 ===== 已有历史摘要 =====
-$existing_summary
+{existing_summary}
 
 ===== 新增对话内容 =====
-$new_conversation
+{new_conversation}
 
 ===== 输出要求 =====
 - 输出整合后的完整摘要（段落格式）
-- 目标长度：约 $target_length 字
+- 目标长度：约 {target_length} 字
 - 直接输出，无需解释
 """
-)
 
 
 # ──────────────────────────────────────────────────────────────
@@ -104,7 +99,7 @@ def get_summarization_user_prompt(
     Returns:
         格式化后的用户 Prompt 字符串。
     """
-    return _SUMMARIZATION_USER_TEMPLATE.substitute(
+    return _SUMMARIZATION_USER_FMT.format(
         conversation_history=conversation_history.strip(),
         target_length=str(target_length),
     )
@@ -136,7 +131,7 @@ def get_incremental_summarization_user_prompt(
     Returns:
         格式化后的用户 Prompt 字符串。
     """
-    return _INCREMENTAL_SUMMARIZATION_USER_TEMPLATE.substitute(
+    return _INCREMENTAL_SUMMARIZATION_USER_FMT.format(
         existing_summary=existing_summary.strip() or "（暂无历史摘要）",
         new_conversation=new_conversation.strip(),
         target_length=str(target_length),
@@ -11,7 +11,7 @@ app/retrieval/chunking.py
 
 import re
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional, Tuple
 
 from app.core.config import settings
 from app.core.logger import get_logger
@@ -23,6 +23,9 @@ DEFAULT_CHUNK_SIZE = 512       # 每个切片的目标字符数
 DEFAULT_CHUNK_OVERLAP = 64     # 相邻切片的重叠字符数
 DEFAULT_MIN_CHUNK_SIZE = 50    # 切片最小字符数（过短则丢弃）
 
+# 句子结束符（句号、问号、感叹号、换行），模块加载时编译一次
+_SENTENCE_END_RE = re.compile(r"[。！？.!?\n]")
+
 
 @dataclass
 class TextChunk:
@@ -43,6 +46,29 @@ class TextChunk:
     metadata: dict = field(default_factory=dict)
 
 
+@dataclass
+class ChunkBatch:
+    """
+    一批文本切片的列式（SoA）存储，供批量向量化与写入 Milvus 使用。
+
+    各列表按下标一一对应，第 i 个切片的 chunk_idx 即为 i；
+    相比 List[TextChunk] 不为每个切片创建对象，向量化时可直接使用 contents 列。
+
+    Attributes:
+        contents:    各切片文本内容。
+        start_chars: 各切片在所属原文中的起始字符位置。
+        end_chars:   各切片在所属原文中的结束字符位置。
+        metadata:    整批共享的元数据字典。
+    """
+    contents: List[str] = field(default_factory=list)
+    start_chars: List[int] = field(default_factory=list)
+    end_chars: List[int] = field(default_factory=list)
+    metadata: dict = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.contents)
+
+
 class TextChunker:
     """
     滑动窗口文本分块器。
@@ -94,61 +120,8 @@ class TextChunker:
         Returns:
             TextChunk 列表，按原文顺序排列。
         """
-        if not text or not text.strip():
-            return []
-
-        text = text.strip()
-        base_metadata = metadata or {}
         chunks: List[TextChunk] = []
-
-        # 优先在自然句子边界分割
-        sentences = self._split_into_sentences(text)
-        current_chunk: List[str] = []
-        current_len = 0
-        start_char = 0
-        global_pos = 0  # 追踪在原文中的字符位置
-
-        for sentence in sentences:
-            sentence_len = len(sentence)
-
-            if current_len + sentence_len > self.chunk_size and current_chunk:
-                # 当前切片已满，输出
-                chunk_text = "".join(current_chunk)
-                if len(chunk_text.strip()) >= self.min_chunk_size:
-                    chunks.append(
-                        TextChunk(
-                            content=chunk_text.strip(),
-                            chunk_idx=len(chunks),
-                            start_char=start_char,
-                            end_char=start_char + len(chunk_text),
-                            metadata={**base_metadata},
-                        )
-                    )
-
-                # 保留重叠部分：从末尾回溯 chunk_overlap 字符
-                overlap_text = chunk_text[-self.chunk_overlap:] if self.chunk_overlap > 0 else ""
-                current_chunk = [overlap_text] if overlap_text else []
-                current_len = len(overlap_text)
-                start_char = global_pos - len(overlap_text)
-
-            current_chunk.append(sentence)
-            current_len += sentence_len
-            global_pos += sentence_len
-
-        # 处理末尾剩余内容
-        if current_chunk:
-            chunk_text = "".join(current_chunk)
-            if len(chunk_text.strip()) >= self.min_chunk_size:
-                chunks.append(
-                    TextChunk(
-                        content=chunk_text.strip(),
-                        chunk_idx=len(chunks),
-                        start_char=start_char,
-                        end_char=start_char + len(chunk_text),
-                        metadata={**base_metadata},
-                    )
-                )
-
+        self._append_chunks(text, metadata or {}, chunks)
         logger.debug("文本分块完成 | input_len={} | chunks={}", len(text), len(chunks))
         return chunks
 
@@ -158,7 +131,7 @@ class TextChunker:
         metadata: Optional[dict] = None,
     ) -> List[TextChunk]:
         """
-        对多段文本批量分块，自动合并结果并重新编号切片索引。
+        对多段文本批量分块，自动合并结果，切片索引全局连续。
 
         Args:
             texts:    文本列表。
@@ -168,28 +141,200 @@ class TextChunker:
             合并后的 TextChunk 列表。
         """
         all_chunks: List[TextChunk] = []
+        base_metadata = metadata or {}
+        # 所有文本的切片直接追加到同一列表，创建时即分配全局索引，无需事后重新编号
         for text in texts:
-            chunks = self.chunk(text, metadata=metadata)
-            # 重新编号，确保全局索引连续
-            for chunk in chunks:
-                chunk.chunk_idx = len(all_chunks)
-                all_chunks.append(chunk)
+            self._append_chunks(text, base_metadata, all_chunks)
+        logger.debug("批量分块完成 | texts={} | chunks={}", len(texts), len(all_chunks))
         return all_chunks
 
+    def chunk_stream(
+        self,
+        text_iter: Iterable[str],
+        metadata: Optional[dict] = None,
+    ) -> Iterator[TextChunk]:
+        """
+        流式分块：逐段消费文本片段（如按行读取的长对话记录），每当切片边界确定即产出切片。
+
+        结果与 chunk("".join(text_iter)) 一致，但不会一次性物化全文：
+        内存中只保留当前切片窗口与尚未结束的句子，峰值内存为 O(chunk_size)。
+
+        Args:
+            text_iter: 文本片段迭代器，片段可在句子中间任意断开。
+            metadata:  附加元数据（将复制到每个切片）。
+
+        Yields:
+            TextChunk，按原文顺序产出；下标相对于去除首尾空白后的全文。
+        """
+        base_metadata = metadata or {}
+        chunk_idx = 0
+        window = ""      # 原文 [window_start, pos) 区间的文本
+        window_start = 0
+        seg_start = 0
+        pos = 0
+
+        def _make(start: int, end: int) -> Optional[TextChunk]:
+            content = window[start - window_start : end - window_start].strip()
+            if len(content) < self.min_chunk_size:
+                return None
+            return TextChunk(
+                content=content,
+                chunk_idx=chunk_idx,
+                start_char=start,
+                end_char=end,
+                metadata={**base_metadata},
+            )
+
+        for sentence in _iter_stream_sentences(text_iter):
+            end = pos + len(sentence)
+            if end - seg_start > self.chunk_size and pos > seg_start:
+                chunk = _make(seg_start, pos)
+                if chunk is not None:
+                    yield chunk
+                    chunk_idx += 1
+                seg_start = max(seg_start, pos - self.chunk_overlap) if self.chunk_overlap > 0 else pos
+                # 丢弃新切片起点之前的文本，窗口只保留仍可能被输出的部分
+                window = window[seg_start - window_start :]
+                window_start = seg_start
+            window += sentence
+            pos = end
+
+        if pos > seg_start:
+            chunk = _make(seg_start, pos)
+            if chunk is not None:
+                yield chunk
+
+    def chunk_batch(
+        self,
+        texts: List[str],
+        metadata: Optional[dict] = None,
+    ) -> ChunkBatch:
+        """
+        对多段文本批量分块，结果以列式 ChunkBatch 返回（切片顺序与 chunk_texts 一致）。
+
+        Args:
+            texts:    文本列表。
+            metadata: 整批共享的元数据。
+
+        Returns:
+            ChunkBatch。
+        """
+        batch = ChunkBatch(metadata=metadata or {})
+        for text in texts:
+            for content, start, end in self._iter_kept(text):
+                batch.contents.append(content)
+                batch.start_chars.append(start)
+                batch.end_chars.append(end)
+        logger.debug("批量分块完成 | texts={} | chunks={}", len(texts), len(batch))
+        return batch
+
+    def _append_chunks(self, text: str, base_metadata: dict, out: List[TextChunk]) -> None:
+        """
+        将单段文本的切片追加到 out，chunk_idx 按 out 中的位置连续编号。
+
+        Args:
+            text:          待分块的原始文本。
+            base_metadata: 附加元数据（将复制到每个切片）。
+            out:           输出列表。
+        """
+        for content, start, end in self._iter_kept(text):
+            out.append(
+                TextChunk(
+                    content=content,
+                    chunk_idx=len(out),
+                    start_char=start,
+                    end_char=end,
+                    metadata={**base_metadata},
+                )
+            )
+
+    def _iter_kept(self, text: str) -> Iterator[Tuple[str, int, int]]:
+        """产出单段文本中长度达标的切片 (content, start, end)。"""
+        if not text or not text.strip():
+            return
+
+        text = text.strip()
+        for start, end in self._iter_spans(text):
+            content = text[start:end].strip()
+            if len(content) >= self.min_chunk_size:
+                yield content, start, end
+
+    def _iter_spans(self, text: str) -> Iterator[Tuple[int, int]]:
+        """
+        在句子边界上滑动窗口，产出各切片在原文中的 (start, end) 下标。
+
+        切片始终是原文的连续区间：输出时只切一次 text[start:end]，
+        重叠部分通过回退 start 实现，不再拼接句子列表或复制重叠文本。
+
+        Args:
+            text: 已去除首尾空白的输入文本。
+
+        Yields:
+            (start, end) 字符下标对。
+        """
+        seg_start = 0  # 当前切片起点
+        pos = 0        # 当前切片终点（已纳入的最后一个句子末尾）
+
+        for sentence in self._split_into_sentences(text):
+            end = pos + len(sentence)
+            if end - seg_start > self.chunk_size and pos > seg_start:
+                # 当前切片已满，输出
+                yield seg_start, pos
+                # 保留重叠部分：新切片从末尾回溯 chunk_overlap 字符处开始
+                seg_start = max(seg_start, pos - self.chunk_overlap) if self.chunk_overlap > 0 else pos
+            pos = end
+
+        # 处理末尾剩余内容
+        if pos > seg_start:
+            yield seg_start, pos
+
     @staticmethod
-    def _split_into_sentences(text: str) -> List[str]:
+    def _split_into_sentences(text: str) -> Iterator[str]:
         """
-        按句子边界（句号、换行符等）将文本拆分为句子列表。
+        按句子边界（句号、换行符等）将文本逐句切出。
         每个元素保留末尾分隔符，以便重新拼接时不丢失信息。
 
+        以 finditer 定位分隔符并按下标切片，逐句产出，不构造中间的 split 列表。
+
         Args:
             text: 输入文本。
 
-        Returns:
-            句子字符串列表。
+        Yields:
+            非空句子字符串。
         """
-        # 在句子结束标点后分割，保留分隔符
-        pattern = r'(?<=[。！？.!?\n])'
-        parts = re.split(pattern, text)
-        # 过滤空字符串，保留有效句子片段
-        return [p for p in parts if p]
\ No newline at end of file
+        prev = 0
+        for match in _SENTENCE_END_RE.finditer(text):
+            end = match.end()
+            yield text[prev:end]
+            prev = end
+        if prev < len(text):
+            yield text[prev:]
+
+
+def _iter_stream_sentences(text_iter: Iterable[str]) -> Iterator[str]:
+    """
+    从文本片段流中逐句切出句子，结果与对拼接并去除首尾空白后的全文调用
+    TextChunker._split_into_sentences 一致。
+
+    末尾的空白暂不切分（可能属于全文末尾、需被去除），直到后续片段出现非空白字符。
+    """
+    pending = ""
+    started = False
+    for piece in text_iter:
+        if not started:
+            piece = piece.lstrip()
+            if not piece:
+                continue
+            started = True
+        pending += piece
+        core = pending.rstrip()
+        prev = 0
+        for match in _SENTENCE_END_RE.finditer(core):
+            end = match.end()
+            yield pending[prev:end]
+            prev = end
+        pending = pending[prev:]
+
+    tail = pending.rstrip()
+    if tail:
+        yield tail
@@ -0,0 +1,132 @@
+"""
+app/retrieval/embed_cache.py
+============================
+持久化向量缓存模块：以 SQLite 保存 文本 → 向量 的映射，服务重启后仍可复用。
+
+存储说明：
+  - 文件路径：data/embed_cache.sqlite3（与用户数据同卷，随容器持久化）。
+  - 键：sha256("{模型名}:{文本}")，更换 Embedding 模型后旧向量自然不再命中。
+  - 值：float32 向量的原始字节（与 Milvus FLOAT_VECTOR 精度一致）。
+  - WAL 模式，读写互不阻塞；所有方法为同步调用，异步场景需经线程池调用。
+"""
+
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 单条 SQL 中 IN (...) 的最大参数个数（低于 SQLite 默认上限 999）
+_SQL_BATCH = 500
+
+
+class EmbedCache:
+    """
+    基于 SQLite 的向量缓存。
+
+    单连接 + 互斥锁，可在多个线程中安全调用。
+    """
+
+    def __init__(self, path: Path, model: str) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._model = model
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vec BLOB NOT NULL) WITHOUT ROWID"
+        )
+        self._conn.commit()
+        logger.info("EmbedCache 初始化 | path={} | model={}", path, model)
+
+    def _key(self, text: str) -> bytes:
+        return hashlib.sha256(f"{self._model}:{text}".encode("utf-8")).digest()
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """
+        批量查询缓存。
+
+        Args:
+            texts: 文本列表。
+
+        Returns:
+            与输入一一对应的向量列表，未命中的位置为 None。
+        """
+        keys = [self._key(t) for t in texts]
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), _SQL_BATCH):
+                batch = keys[start : start + _SQL_BATCH]
+                rows = self._conn.execute(
+                    f"SELECT key, vec FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                found.update(rows)
+        return [
+            np.frombuffer(found[k], dtype=np.float32).tolist() if k in found else None
+            for k in keys
+        ]
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[List[float]]) -> None:
+        """
+        批量写入缓存（已存在的键覆盖写入）。
+
+        Args:
+            texts:   文本列表。
+            vectors: 与 texts 一一对应的向量列表。
+        """
+        rows = [
+            (self._key(t), np.asarray(v, dtype=np.float32).tobytes())
+            for t, v in zip(texts, vectors)
+        ]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings (key, vec) VALUES (?, ?)", rows)
+            self._conn.commit()
+
+    def close(self) -> None:
+        """关闭数据库连接。"""
+        with self._lock:
+            self._conn.close()
+
+
+# 模块级单例，首次使用时创建；初始化失败后不再重试
+_cache: Optional[EmbedCache] = None
+_cache_failed = False
+_cache_lock = threading.Lock()
+
+
+def get_embed_cache() -> Optional[EmbedCache]:
+    """
+    获取全局向量缓存单例；未启用（EMBED_CACHE_ENABLED=false）或初始化失败时返回 None。
+    """
+    global _cache, _cache_failed
+    if not settings.embed_cache_enabled or _cache_failed:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None and not _cache_failed:
+                try:
+                    _cache = EmbedCache(
+                        Path(settings.data_dir) / "embed_cache.sqlite3",
+                        settings.my_embedding_model,
+                    )
+                except Exception as e:
+                    logger.error("EmbedCache 初始化失败，向量缓存停用 | error={}", e)
+                    _cache_failed = True
+    return _cache
+
+
+def close_embed_cache() -> None:
+    """关闭全局向量缓存（在应用关闭时调用）。"""
+    global _cache
+    if _cache is not None:
+        _cache.close()
+        _cache = None
@@ -8,15 +8,20 @@ app/retrieval/embeddings.py
   - 支持批量向量化以提升效率。
 """
 
+import asyncio
 import os
-from typing import List
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Sequence
 
-from openai import OpenAI
-from tenacity import retry, stop_after_attempt, wait_exponential
+import numpy as np
+from openai import AsyncOpenAI, OpenAI
+from tenacity import AsyncRetrying, retry, stop_after_attempt, wait_exponential
 
 from app.core.config import settings
 from app.core.exceptions import EmbeddingError
 from app.core.logger import get_logger
+from app.retrieval.embed_cache import EmbedCache, get_embed_cache
 
 logger = get_logger(__name__)
 
@@ -40,8 +45,20 @@ client: OpenAI = OpenAI(
     base_url=API_BASE_URL,
 )
 
-# 批量向量化的最大批次大小（避免单次请求过大）
-BATCH_SIZE = 32
+# 异步客户端：供 embed_texts_async 在事件循环内并发发起批次请求
+async_client: AsyncOpenAI = AsyncOpenAI(
+    api_key=MY_API_KEY,
+    base_url=API_BASE_URL,
+)
+
+# 批量向量化的最大批次大小（避免单次请求过大，需不超过服务商单次输入上限）
+BATCH_SIZE: int = settings.embed_batch_size
+
+# embed_texts_async 同时在途的最大批次数
+MAX_CONCURRENT_BATCHES: int = settings.embed_max_concurrency
+
+# query 向量缓存容量（按不同 query 条数计）
+QUERY_CACHE_SIZE = 2048
 
 
 # ──────────────────────────────────────────────────────────────
@@ -65,6 +82,21 @@ def get_embeddings(test_texts: List[str]) -> list:
     return response
 
 
+def _ordered_embeddings(data: list, size: int) -> List[List[float]]:
+    """
+    按响应中每项的 index 直接放入对应位置，确保顺序与输入一致（无需排序）。
+
+    Raises:
+        EmbeddingError: 返回条数与输入不一致时抛出。
+    """
+    if len(data) != size:
+        raise EmbeddingError(detail=f"Embedding 返回数量不匹配: 期望 {size}，实际 {len(data)}")
+    ordered: List[List[float]] = [None] * size  # type: ignore[list-item]
+    for item in data:
+        ordered[item.index] = item.embedding
+    return ordered
+
+
 @retry(
     stop=stop_after_attempt(3),
     wait=wait_exponential(multiplier=1, min=1, max=8),
@@ -101,10 +133,7 @@ def embed_texts(texts: List[str]) -> List[List[float]]:
 
         try:
             response = get_embeddings(batch)
-            # 解析响应：按 index 排序确保顺序与输入一致
-            sorted_data = sorted(response.data, key=lambda x: x.index)
-            batch_embeddings = [item.embedding for item in sorted_data]
-            all_embeddings.extend(batch_embeddings)
+            all_embeddings.extend(_ordered_embeddings(response.data, len(batch)))
 
         except Exception as e:
             logger.error("Embedding 调用失败 | batch_start={} | error={}", batch_start, e)
@@ -114,6 +143,108 @@ def embed_texts(texts: List[str]) -> List[List[float]]:
     return all_embeddings
 
 
+async def embed_texts_async(texts: List[str]) -> List[List[float]]:
+    """
+    embed_texts 的异步版本：所有批次并发请求（最多 MAX_CONCURRENT_BATCHES 个同时在途），
+    K 个批次的总耗时由 K×RTT 降至约 1×RTT。每个批次独立重试（最多 3 次，指数退避）。
+
+    Args:
+        texts: 待向量化的文本列表。
+
+    Returns:
+        每个文本对应的向量列表，顺序与输入一致。
+
+    Raises:
+        EmbeddingError: 任一批次在所有重试失败后抛出。
+    """
+    if not texts:
+        return []
+
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_BATCHES)
+    total_batches = (len(texts) + BATCH_SIZE - 1) // BATCH_SIZE
+
+    async def _embed_batch(batch_start: int) -> List[List[float]]:
+        batch = texts[batch_start : batch_start + BATCH_SIZE]
+        async with semaphore:
+            logger.debug(
+                "向量化批次 | batch [{}/{}] | texts={}",
+                batch_start // BATCH_SIZE + 1, total_batches, len(batch),
+            )
+            try:
+                async for attempt in AsyncRetrying(
+                    stop=stop_after_attempt(3),
+                    wait=wait_exponential(multiplier=1, min=1, max=8),
+                    reraise=True,
+                ):
+                    with attempt:
+                        response = await async_client.embeddings.create(
+                            model=EMBEDDING_MODEL_NAME,
+                            input=batch,
+                        )
+            except Exception as e:
+                logger.error("Embedding 调用失败 | batch_start={} | error={}", batch_start, e)
+                raise EmbeddingError(detail=f"Embedding API 调用失败: {e}")
+
+        return _ordered_embeddings(response.data, len(batch))
+
+    # gather 按提交顺序返回结果，拼接后与输入顺序一致
+    batches = await asyncio.gather(
+        *(_embed_batch(start) for start in range(0, len(texts), BATCH_SIZE))
+    )
+    all_embeddings = [vec for batch_embeddings in batches for vec in batch_embeddings]
+
+    logger.debug("向量化完成 | texts={} | dim={}", len(texts), len(all_embeddings[0]) if all_embeddings else 0)
+    return all_embeddings
+
+
+async def embed_texts_cached(texts: List[str]) -> List[List[float]]:
+    """
+    带持久化缓存的批量向量化：先查 SQLite 向量缓存，仅对未命中的文本调用 embed_texts_async，
+    并将新向量写回缓存。缓存未启用或读写失败时等同于 embed_texts_async。
+
+    Args:
+        texts: 待向量化的文本列表。
+
+    Returns:
+        每个文本对应的向量列表，顺序与输入一致。
+
+    Raises:
+        EmbeddingError: 未命中部分向量化失败时抛出。
+    """
+    cache = get_embed_cache()
+    if cache is None or not texts:
+        return await embed_texts_async(texts)
+
+    vectors = await asyncio.to_thread(_cache_lookup, cache, texts)
+    missing = [i for i, vec in enumerate(vectors) if vec is None]
+    if missing:
+        miss_texts = [texts[i] for i in missing]
+        new_vectors = await embed_texts_async(miss_texts)
+        for i, vec in zip(missing, new_vectors):
+            vectors[i] = vec
+        await asyncio.to_thread(_cache_store, cache, miss_texts, new_vectors)
+
+    logger.debug("向量缓存查询 | texts={} | hits={}", len(texts), len(texts) - len(missing))
+    return vectors  # type: ignore[return-value]
+
+
+def _cache_lookup(cache: EmbedCache, texts: Sequence[str]) -> List[Optional[List[float]]]:
+    """查询向量缓存，失败时视为全部未命中。"""
+    try:
+        return cache.get_many(texts)
+    except Exception as e:
+        logger.warning("向量缓存读取失败 | error={}", e)
+        return [None] * len(texts)
+
+
+def _cache_store(cache: EmbedCache, texts: Sequence[str], vectors: Sequence[List[float]]) -> None:
+    """写入向量缓存，失败仅记录日志。"""
+    try:
+        cache.put_many(texts, vectors)
+    except Exception as e:
+        logger.warning("向量缓存写入失败 | error={}", e)
+
+
 def embed_single(text: str) -> List[float]:
     """
     对单条文本进行向量化，是 embed_texts 的便捷封装。
@@ -131,3 +262,59 @@ def embed_single(text: str) -> List[float]:
     if not results:
         raise EmbeddingError(detail="向量化结果为空")
     return results[0]
+
+
+def normalize_query(text: str) -> str:
+    """规范化 query 作为缓存键：去除首尾空白、转小写、合并连续空白。"""
+    return " ".join(text.strip().lower().split())
+
+
+# query 向量 LRU：规范化 query → 向量。以紧凑的 float32 数组缓存（1024 维约 4KB，Python float 列表约 32KB）
+_query_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+_query_cache_lock = threading.Lock()
+
+
+def _compute_query_vector(text: str) -> np.ndarray:
+    # 进程内未命中时再查持久化缓存（按原文精确匹配）；失败时抛出异常，不写入缓存
+    cache = get_embed_cache()
+    if cache is not None:
+        hit = _cache_lookup(cache, [text])[0]
+        if hit is not None:
+            return np.asarray(hit, dtype=np.float32)
+    vec = embed_single(text)
+    if cache is not None:
+        _cache_store(cache, [text], [vec])
+    return np.asarray(vec, dtype=np.float32)
+
+
+def embed_query(text: str) -> List[float]:
+    """
+    对检索 query 向量化，带进程内 LRU 缓存：规范化后相同的 query 直接返回已缓存的向量。
+
+    规范化仅用于缓存键，未命中时以原始文本计算向量。
+    对话场景中用户重试或重复提问较常见，命中时免去一次 Embedding API 往返。
+    每次调用返回新的列表，调用方可自由修改。
+
+    Args:
+        text: 原始 query 文本。
+
+    Returns:
+        向量浮点数列表。
+
+    Raises:
+        EmbeddingError: 向量化失败时抛出。
+    """
+    key = normalize_query(text)
+    with _query_cache_lock:
+        vec = _query_cache.get(key)
+        if vec is not None:
+            _query_cache.move_to_end(key)
+            return vec.tolist()
+
+    vec = _compute_query_vector(text)
+    with _query_cache_lock:
+        _query_cache[key] = vec
+        _query_cache.move_to_end(key)
+        if len(_query_cache) > QUERY_CACHE_SIZE:
+            _query_cache.popitem(last=False)
+    return vec.tolist()
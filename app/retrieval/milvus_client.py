@@ -12,7 +12,11 @@ Milvus 原生全文索引版（Milvus >= 2.5）
 """
 
 import asyncio
-from typing import Any, Dict, List, Optional
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
 from pymilvus import (
     AnnSearchRequest,
@@ -47,16 +51,47 @@ USER_ID_MAX_LEN = 128
 SPARSE_WEIGHT = 0.3
 DENSE_WEIGHT  = 0.7
 
+# pymilvus 为同步 API：专用线程池承载 Milvus I/O，不与默认线程池中的文件 I/O 等任务争抢
+_MILVUS_EXECUTOR = ThreadPoolExecutor(max_workers=16, thread_name_prefix="milvus")
+
+# 两次 flush 之间的最小间隔（秒）。flush 会强制封存 segment、开销很大，不再每次插入都执行；
+# 插入的数据无需 flush 即可被检索，Milvus 也会自动封存与落盘
+FLUSH_INTERVAL = 5.0
+
+# 稠密向量 HNSW 索引构建参数（仅对新建 Collection 生效）
+DENSE_INDEX_PARAMS = {"M": 16, "efConstruction": 200}
+
+# 稠密向量检索参数：按 Collection 上实际存在的索引类型选择（已有部署可能仍为 IVF 系列索引）
+HNSW_SEARCH_EF = 64       # HNSW 检索候选队列长度下限，实际取 max(ef, top_k)
+IVF_SEARCH_NPROBE = 16    # IVF_FLAT / IVF_SQ8 等检索的聚类桶数
+
+# user_id 作为 Partition Key 时的分区数：按 user_id 哈希路由，单用户检索只扫描其所在分区
+NUM_PARTITIONS = 64
+
+
+def _dense_index_type(collection: Collection) -> str:
+    """返回稠密向量字段上已建索引的类型（如 "HNSW"、"IVF_FLAT"），无法识别时按 HNSW 处理。"""
+    for index in collection.indexes:
+        if index.field_name == FIELD_DENSE_EMBEDDING:
+            return str(index.params.get("index_type", "HNSW")).upper()
+    return "HNSW"
+
 
 def _build_schema() -> CollectionSchema:
     """
     Schema 关键变化：
       1. content 字段添加 enable_analyzer=True，允许 Milvus 对其进行分词
       2. 新增 BM25 Function，声明 content → sparse_embedding 的自动转换关系
+      3. user_id 设为 Partition Key，带 user_id 过滤的检索只路由到对应分区
     """
     fields = [
         FieldSchema(name=FIELD_ID,               dtype=DataType.INT64,         is_primary=True, auto_id=True),
-        FieldSchema(name=FIELD_USER_ID,          dtype=DataType.VARCHAR,       max_length=USER_ID_MAX_LEN),
+        FieldSchema(
+            name=FIELD_USER_ID,
+            dtype=DataType.VARCHAR,
+            max_length=USER_ID_MAX_LEN,
+            is_partition_key=True,      # 按 user_id 哈希分区，多租户检索只扫描单个分区
+        ),
         FieldSchema(
             name=FIELD_CONTENT,
             dtype=DataType.VARCHAR,
@@ -87,6 +122,11 @@ def _build_schema() -> CollectionSchema:
     return schema
 
 
+def _escape_str(value: str) -> str:
+    """转义字符串字面量中的反斜杠与双引号，防止过滤表达式被注入。"""
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
 class MilvusClient:
 
     def __init__(self) -> None:
@@ -94,9 +134,15 @@ class MilvusClient:
         self._host = settings.milvus_host
         self._port = settings.milvus_port
         self._collection: Optional[Collection] = None
+        self._dense_index_type = "HNSW"  # 连接时按 Collection 实际索引更新
         self._connected = False
         self._sparse_weight = settings.hybrid_sparse_weight
         self._dense_weight  = settings.hybrid_dense_weight
+        # flush 合并：距上次 flush 超过 FLUSH_INTERVAL 的插入才顺带执行一次 flush
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        # 检索合并：(user_id, query_text, top_k) → 进行中的检索；并发的相同检索共享一次 gRPC 调用
+        self._inflight_searches: Dict[Tuple[str, str, int], "asyncio.Future[List[Dict[str, Any]]]"] = {}
         logger.info(
             "MilvusClient 初始化（原生BM25模式）| host={}:{} | 权重=BM25:{}/Dense:{}",
             self._host, self._port, self._sparse_weight, self._dense_weight,
@@ -118,12 +164,22 @@ class MilvusClient:
     def _ensure_connected(self) -> bool:
         if self._connected and self._collection is not None:
             return True
+        # gRPC 通道仍在时只重新绑定 Collection，避免拆除并重建连接
+        if connections.has_connection("default"):
+            try:
+                self._collection = self._get_or_create_collection()
+                self._connected = True
+                logger.info("复用已有 Milvus 连接 | {}:{}", self._host, self._port)
+                return True
+            except Exception as e:
+                logger.warning("复用已有 Milvus 连接失败，重新建立连接 | error={}", e)
         logger.warning("Milvus 未连接，尝试自动重连...")
         return self.connect()
 
     async def ping(self) -> bool:
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self._ping_sync)
+        """健康检查：在 Milvus 专用线程池中探测连接（不用 asyncio.to_thread，以免占用默认线程池）。"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_MILVUS_EXECUTOR, self._ping_sync)
 
     def _ping_sync(self) -> bool:
         try:
@@ -145,18 +201,33 @@ class MilvusClient:
                 logger.info("Collection 已 Loaded，跳过 load()")
         else:
             schema = _build_schema()
-            collection = Collection(name=self._collection_name, schema=schema)
+            collection = Collection(
+                name=self._collection_name,
+                schema=schema,
+                num_partitions=NUM_PARTITIONS,
+            )
             logger.info("创建新 Collection（原生BM25）: {}", self._collection_name)
             self._create_index(collection)
             collection.load()
 
+        self._dense_index_type = _dense_index_type(collection)
+        logger.info("稠密向量索引类型: {}", self._dense_index_type)
         return collection
 
+    def _dense_search_param(self, top_k: int) -> Dict[str, Any]:
+        """根据稠密向量的实际索引类型构造检索参数。"""
+        if self._dense_index_type == "HNSW":
+            # HNSW 要求 ef >= limit，否则检索报错
+            return {"metric_type": "COSINE", "params": {"ef": max(HNSW_SEARCH_EF, top_k)}}
+        if self._dense_index_type.startswith("IVF"):
+            return {"metric_type": "COSINE", "params": {"nprobe": IVF_SEARCH_NPROBE}}
+        return {"metric_type": "COSINE", "params": {}}
+
     @staticmethod
     def _create_index(collection: Collection) -> None:
         """
         索引变化：
-          - 稠密向量：IVF_FLAT + COSINE（不变）
+          - 稠密向量：HNSW + COSINE（图索引，每次检索只访问 O(log N) 个向量，QPS/召回率优于 IVF 系列）
           - 稀疏向量：SPARSE_INVERTED_INDEX + BM25（metric_type 改为 "BM25"，不再是 "IP"）
         """
         existing = [idx.field_name for idx in collection.indexes]
@@ -164,7 +235,7 @@ class MilvusClient:
         if FIELD_DENSE_EMBEDDING not in existing:
             collection.create_index(
                 field_name=FIELD_DENSE_EMBEDDING,
-                index_params={"metric_type": "COSINE", "index_type": "IVF_FLAT", "params": {"nlist": 128}},
+                index_params={"metric_type": "COSINE", "index_type": "HNSW", "params": DENSE_INDEX_PARAMS},
             )
             logger.info("稠密向量索引创建完成")
 
@@ -220,7 +291,7 @@ class MilvusClient:
                 for i in range(len(contents))
             ]
             result = self._collection.insert(rows)
-            self._collection.flush()
+            self._maybe_flush()
             count = len(result.primary_keys)
             logger.info("Milvus 插入成功（原生BM25自动编码）| user_id={} | count={}", user_id, count)
             return count
@@ -229,6 +300,35 @@ class MilvusClient:
             self._connected = False
             return 0
 
+    async def insert_async(
+        self,
+        user_id: str,
+        contents: List[str],
+        embeddings: List[List[float]],
+        timestamp: str,
+    ) -> int:
+        """insert 的异步版本：在 Milvus 专用线程池中执行，不阻塞事件循环。"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _MILVUS_EXECUTOR,
+            functools.partial(
+                self.insert,
+                user_id=user_id,
+                contents=contents,
+                embeddings=embeddings,
+                timestamp=timestamp,
+            ),
+        )
+
+    def _maybe_flush(self) -> None:
+        """距上次 flush 已超过 FLUSH_INTERVAL 时执行一次 flush，否则交由 Milvus 自动封存。"""
+        with self._flush_lock:
+            now = time.monotonic()
+            if now - self._last_flush < FLUSH_INTERVAL:
+                return
+            self._last_flush = now
+        self._collection.flush()
+
     # ── 检索操作 ─────────────────────────────────────────────
 
     def search(
@@ -241,7 +341,8 @@ class MilvusClient:
         if not self._ensure_connected():
             return []
 
-        expr = f'{FIELD_USER_ID} == "{user_id}"'
+        # user_id 是 Partition Key：该过滤条件既保证多租户隔离，也让 Milvus 只检索对应分区
+        expr = f'{FIELD_USER_ID} == "{_escape_str(user_id)}"'
 
         try:
             return self._hybrid_search(
@@ -255,6 +356,38 @@ class MilvusClient:
 
         return self._dense_search(query_vector=query_vector, expr=expr, top_k=top_k)
 
+    async def search_async(
+        self,
+        user_id: str,
+        query_vector: List[float],
+        query_text: str,
+        top_k: int = 10,
+    ) -> List[Dict[str, Any]]:
+        """
+        search 的异步版本：在 Milvus 专用线程池中执行，不阻塞事件循环。
+
+        同一用户的相同查询（query_vector 由 query_text 确定）若已在进行中，
+        直接等待其结果，N 个并发重复检索只发起一次 gRPC 调用。
+        """
+        key = (user_id, query_text, top_k)
+        inflight = self._inflight_searches.get(key)
+        if inflight is None:
+            loop = asyncio.get_running_loop()
+            inflight = loop.run_in_executor(
+                _MILVUS_EXECUTOR,
+                functools.partial(
+                    self.search,
+                    user_id=user_id,
+                    query_vector=query_vector,
+                    query_text=query_text,
+                    top_k=top_k,
+                ),
+            )
+            self._inflight_searches[key] = inflight
+            inflight.add_done_callback(lambda _: self._inflight_searches.pop(key, None))
+        # shield：某个等待方被取消时不影响共享同一检索的其他请求
+        return list(await asyncio.shield(inflight))
+
     def _hybrid_search(
         self,
         query_vector: List[float],
@@ -273,7 +406,7 @@ class MilvusClient:
         dense_req = AnnSearchRequest(
             data=[query_vector],
             anns_field=FIELD_DENSE_EMBEDDING,
-            param={"metric_type": "COSINE", "params": {"nprobe": 16}},
+            param=self._dense_search_param(top_k),
             limit=top_k,
             expr=expr,
         )
@@ -322,7 +455,7 @@ class MilvusClient:
             results = self._collection.search(
                 data=[query_vector],
                 anns_field=FIELD_DENSE_EMBEDDING,
-                param={"metric_type": "COSINE", "params": {"nprobe": 16}},
+                param=self._dense_search_param(top_k),
                 limit=top_k,
                 expr=expr,
                 output_fields=[FIELD_CONTENT, FIELD_TIMESTAMP, FIELD_USER_ID],
@@ -9,14 +9,23 @@ app/retrieval/reranker.py
   Level 3（兜底）：直接返回原始召回顺序，不进行重排。
 
 ⚠️ 任何一级失败均自动切换到下一级，不会中断主线程。
+
+rerank_async() 在事件循环内通过 httpx.AsyncClient / AsyncOpenAI 直接发起请求，
+不占用线程池，供 Retriever 使用。
 """
 
-import json
+import asyncio
+import hashlib
+import heapq
 import os
+import time
+from collections import OrderedDict
 from typing import Any, Dict, List, Optional, Tuple
 
-import requests
-from openai import OpenAI
+import httpx
+import numpy as np
+import orjson
+from openai import AsyncOpenAI
 
 from app.core.config import settings
 from app.core.exceptions import RerankerError
@@ -33,8 +42,8 @@ API_BASE_URL: str = settings.my_api_base
 CHAT_MODEL_NAME: str = settings.my_emb_model
 EMBEDDING_MODEL_NAME: str = settings.my_embedding_model
 
-# 降级用 Embedding 客户端
-_embed_client: OpenAI = OpenAI(
+# 降级用异步 Embedding 客户端
+_async_embed_client: AsyncOpenAI = AsyncOpenAI(
     api_key=MY_API_KEY,
     base_url=API_BASE_URL,
 )
@@ -42,6 +51,54 @@ _embed_client: OpenAI = OpenAI(
 # 本地重排服务地址（通过 .env 配置，默认 localhost）
 RERANKER_URL: str = os.getenv("RERANKER_URL", "http://host.docker.internal:8877/rerank")
 
+# 本地重排请求头：请求体由 orjson 预先序列化为 bytes
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# 本地重排超时（秒）：(连接超时, 读取超时)
+RERANK_TIMEOUT = (2, 10)
+
+# 本地重排异步 HTTP 客户端：复用 Keep-Alive 连接，避免每次重排都重新建立 TCP（及 TLS）连接
+_ASYNC_CLIENT: httpx.AsyncClient = httpx.AsyncClient(
+    limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+    timeout=httpx.Timeout(RERANK_TIMEOUT[1], connect=RERANK_TIMEOUT[0]),
+)
+
+# 连接空闲超过该时长（秒）即视为可能已被服务端关闭，检索时需预热
+RERANK_WARM_INTERVAL = 30.0
+
+# 最近一次与本地重排服务成功通信的时间（time.monotonic()）
+_last_contact: float = 0.0
+
+# 熔断器：本地重排连续失败 RERANKER_CB_FAILURES 次后，RERANKER_CB_COOLDOWN 秒内直接跳过 Level 1，
+# 避免服务宕机时每次检索都等满超时才降级。冷却结束后进入半开状态，只放行一个试探请求：
+# 成功则关闭熔断器，失败则重新熔断，其余请求在试探结束前继续降级
+RERANKER_CB_FAILURES: int = settings.reranker_cb_failures
+RERANKER_CB_COOLDOWN: float = settings.reranker_cb_cooldown
+_cb_failures: int = 0
+_cb_open_until: float = 0.0
+_cb_tripped: bool = False          # 已熔断且尚未被成功请求关闭（冷却结束后即为半开）
+_cb_trial_inflight: bool = False   # 半开状态下的试探请求是否正在进行
+
+# 本地重排结果缓存：同一 query 与同一组候选文本的排序结果相同，重试或重复提问时直接复用
+RERANK_CACHE_ENABLED: bool = settings.rerank_cache_enabled
+RERANK_CACHE_SIZE = 1024
+_rerank_cache: "OrderedDict[Tuple[bytes, bytes, int], List[int]]" = OrderedDict()
+
+# 进行中的异步本地重排请求：缓存键 → Future，用于合并并发的相同请求
+_inflight_reranks: Dict[Tuple[bytes, bytes, int], "asyncio.Future[Optional[List[int]]]"] = {}
+
+# 候选数 <= top_n + RERANK_SKIP_MARGIN 时跳过重排
+RERANK_SKIP_MARGIN: int = settings.rerank_skip_margin
+
+# rerank_async 返回的实际生效级别
+LEVEL_LOCAL = "local"            # Level 1：本地 Reranker
+LEVEL_EMBEDDING = "embedding"    # Level 2：Embedding 余弦相似度
+LEVEL_FALLBACK = "fallback"      # Level 3：原始召回顺序（兜底）
+LEVEL_SKIPPED = "skipped"        # 候选数不超过 top_n，无需重排
+
+# 推测执行：rerank_async 同时发起 Level 1 与 Level 2，采用先返回的有效结果
+RERANK_SPECULATIVE: bool = settings.rerank_speculative
+
 logger.info("Reranker 初始化 | reranker_url={} | embed_model={}", RERANKER_URL, EMBEDDING_MODEL_NAME)
 
 
@@ -49,215 +106,405 @@ logger.info("Reranker 初始化 | reranker_url={} | embed_model={}", RERANKER_UR
 # 主入口：级联重排
 # ──────────────────────────────────────────────────────────────
 
-def rerank(
+async def rerank_async(
     query: str,
     candidates: List[Dict[str, Any]],
     top_n: int = 5,
-) -> List[Dict[str, Any]]:
+    query_vector: Optional[List[float]] = None,
+) -> Tuple[List[Dict[str, Any]], str]:
     """
     对候选结果进行重排，返回 Top-N 个最相关条目。
 
     级联策略：本地 Reranker HTTP → Embedding 余弦相似度 → 原始顺序。
+    HTTP 请求在事件循环内直接发起。
 
     Args:
-        query:      用户查询文本。
-        candidates: 候选结果列表，每项必须包含 "content" 字段。
-        top_n:      最终返回的结果数量。
+        query:        用户查询文本。
+        candidates:   候选结果列表，每项必须包含 "content" 字段。
+        top_n:        最终返回的结果数量。
+        query_vector: 已计算好的 query 向量；提供时 Embedding 降级重排不再重复向量化 query。
 
     Returns:
-        重排后的 Top-N 候选列表，按相关性降序排列。
+        (重排后的 Top-N 候选列表, 实际生效的级别)，级别为 LEVEL_* 常量之一；
+        调用方可据此区分真实重排结果与 LEVEL_FALLBACK 兜底结果（如后者不应缓存）。
     """
     if not candidates:
-        return []
+        return [], LEVEL_SKIPPED
+    if len(candidates) <= top_n + RERANK_SKIP_MARGIN:
+        # 候选数不超过 Top-N（加余量）时重排几乎不改变返回集合，直接沿用召回顺序
+        logger.debug("候选数较少，跳过重排 | candidates={} | top_n={}", len(candidates), top_n)
+        return candidates[:top_n], LEVEL_SKIPPED
 
     texts = [c.get("content", "") for c in candidates]
 
+    # 推测执行：Level 1 慢而未失败时，不必等满其耗时再降级
+    if RERANK_SPECULATIVE and not _breaker_open():
+        raced = await _race_rerank(query, texts, top_n, query_vector)
+        if raced is not None:
+            ranked_indices, level = raced
+            return _apply_ranking(candidates, ranked_indices, top_n), level
+        logger.warning("所有重排策略失败，返回原始召回顺序（兜底降级）")
+        return candidates[:top_n], LEVEL_FALLBACK
+
     # Level 1: 本地 Reranker HTTP 服务（主路，首选）
-    ranked_indices = _try_local_rerank(query=query, texts=texts)
+    ranked_indices = await _try_local_rerank_async(query=query, texts=texts, top_n=top_n)
     if ranked_indices is not None:
         logger.debug("使用本地 Reranker HTTP 重排 | candidates={}", len(candidates))
-        return _apply_ranking(candidates, ranked_indices, top_n)
+        return _apply_ranking(candidates, ranked_indices, top_n), LEVEL_LOCAL
 
     # Level 2: 内部 Embedding 余弦相似度重排（备用）
-    ranked_indices = _try_embedding_rerank(query=query, texts=texts)
+    ranked_indices = await _try_embedding_rerank_async(
+        query=query, texts=texts, top_n=top_n, query_vector=query_vector,
+    )
     if ranked_indices is not None:
         logger.debug("使用 Embedding 余弦重排（降级）| candidates={}", len(candidates))
-        return _apply_ranking(candidates, ranked_indices, top_n)
+        return _apply_ranking(candidates, ranked_indices, top_n), LEVEL_EMBEDDING
 
     # Level 3: 直接返回原始顺序（兜底）
     logger.warning("所有重排策略失败，返回原始召回顺序（兜底降级）")
-    return candidates[:top_n]
+    return candidates[:top_n], LEVEL_FALLBACK
+
+
+async def _race_rerank(
+    query: str,
+    texts: List[str],
+    top_n: int,
+    query_vector: Optional[List[float]],
+) -> Optional[Tuple[List[int], str]]:
+    """
+    并发执行 Level 1 与 Level 2，返回最先完成的有效排序及其级别并取消另一路；
+    两路同时完成时优先采用 Level 1。均失败时返回 None。
+    """
+    local = asyncio.create_task(_try_local_rerank_async(query=query, texts=texts, top_n=top_n))
+    embedding = asyncio.create_task(
+        _try_embedding_rerank_async(query=query, texts=texts, top_n=top_n, query_vector=query_vector)
+    )
+    pending = {local, embedding}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in (local, embedding):
+                if task in done and task.result() is not None:
+                    logger.debug(
+                        "推测重排采用 {} 结果 | candidates={}",
+                        "本地 Reranker" if task is local else "Embedding 余弦", len(texts),
+                    )
+                    return task.result(), LEVEL_LOCAL if task is local else LEVEL_EMBEDDING
+        return None
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def close() -> None:
+    """关闭异步 HTTP 客户端连接池（在应用关闭时调用）。"""
+    await _ASYNC_CLIENT.aclose()
+    await _async_embed_client.close()
+
+
+async def warm_up_async() -> None:
+    """
+    预热本地重排服务的连接：连接池可能为空（首次调用或空闲过久）时发送一次 HEAD 请求，
+    使 TCP 连接在真正重排前建立好并留在 _ASYNC_CLIENT 连接池中。
+
+    只关心连接是否建立，响应状态码（如 405）不影响效果；失败仅记录日志。
+    """
+    global _last_contact
+    if _breaker_open() or time.monotonic() - _last_contact < RERANK_WARM_INTERVAL:
+        return
+    try:
+        await _ASYNC_CLIENT.head(RERANKER_URL, timeout=RERANK_TIMEOUT[0])
+        _last_contact = time.monotonic()
+    except Exception as e:
+        logger.debug("本地 Reranker 连接预热失败 | url={} | error={}", RERANKER_URL, e)
 
 
 # ──────────────────────────────────────────────────────────────
 # Level 1: 本地 Reranker HTTP 接口
 # ──────────────────────────────────────────────────────────────
 
-# def _try_local_rerank(query: str, texts: List[str]) -> Optional[List[int]]:
-#     """
-#     调用本地/自部署的 Reranker HTTP 服务进行重排。
-
-#     请求格式：{"query": "...", "texts": ["...", "..."]}
-#     响应格式：[{"index": 2, "score": 0.99}, {"index": 0, "score": 0.39}]
-
-#     Args:
-#         query: 查询文本。
-#         texts: 候选文本列表。
-
-#     Returns:
-#         按相关性降序排列的原始索引列表；失败时返回 None 触发降级。
-#     """
-#     url = RERANKER_URL
-#     payload = {"query": query, "texts": texts}
-#     headers = {"Content-Type": "application/json"}
-
-#     try:
-#         response = requests.post(
-#             url,
-#             headers=headers,
-#             data=json.dumps(payload, ensure_ascii=False),
-#             timeout=10,
-#         )
-#         response.raise_for_status()
-#         result = response.json()
-#         # 响应格式: [{"index": 2, "score": 0.99}, {"index": 0, "score": 0.39}]
-#         sorted_result = sorted(result, key=lambda x: x.get("score", 0), reverse=True)
-#         indices = [item["index"] for item in sorted_result]
-#         logger.debug(
-#             "本地 Reranker 重排成功 | top_score={:.4f}",
-#             sorted_result[0].get("score", 0) if sorted_result else 0,
-#         )
-#         return indices
-
-#     except requests.exceptions.ConnectionError:
-#         logger.warning("本地 Reranker 连接失败，触发降级 | url={}", url)
-#     except requests.exceptions.Timeout:
-#         logger.warning("本地 Reranker 调用超时（>10s），触发降级 | url={}", url)
-#     except Exception as e:
-#         logger.warning("本地 Reranker 异常，触发降级 | error={}", str(e))
-
-#     return None
-
-def _try_local_rerank(query: str, texts: List[str]) -> Optional[List[int]]:
+async def _try_local_rerank_async(query: str, texts: List[str], top_n: int) -> Optional[List[int]]:
     """
-    调用本地/自部署的 Reranker HTTP 服务进行重排。
+    调用本地/自部署的 Reranker HTTP 服务进行重排，返回得分最高的 top_n 个原始索引。
+
+    相同 (query, 候选文本, top_n) 的请求若已在进行中，直接等待其结果，
+    N 个并发重复重排只发起一次 HTTP 调用。
     """
+    cache_key = _rerank_cache_key(query, texts, top_n)
+    cached = _rerank_cache_get(cache_key)
+    if cached is not None:
+        return cached
+
+    inflight = _inflight_reranks.get(cache_key)
+    if inflight is None:
+        inflight = asyncio.ensure_future(_post_local_rerank_async(query, texts, top_n, cache_key))
+        _inflight_reranks[cache_key] = inflight
+        inflight.add_done_callback(lambda _: _inflight_reranks.pop(cache_key, None))
+    # shield：某个等待方被取消（如推测执行中落败）时不影响共享同一请求的其他调用方
+    indices = await asyncio.shield(inflight)
+    return list(indices) if indices is not None else None
+
+
+async def _post_local_rerank_async(
+    query: str,
+    texts: List[str],
+    top_n: int,
+    cache_key: Tuple[bytes, bytes, int],
+) -> Optional[List[int]]:
+    """向本地 Reranker 发起一次异步重排请求，成功时写入结果缓存。"""
+    global _last_contact
     url = RERANKER_URL
-    
-    # 过滤掉可能的空字符串，有些 Reranker 遇到空字符串会报 400 错误
-    valid_texts = [t for t in texts if t.strip()]
+
+    # 过滤空字符串（有些 Reranker 遇到空字符串会报 400 错误）并合并重复文本，
+    # 排序结果再映射回原始索引
+    valid_texts, groups = _dedup_texts(texts)
     if not valid_texts:
         return None
-
-    payload = {"query": query, "texts": valid_texts}
+    if not _breaker_acquire():
+        logger.debug("本地 Reranker 熔断中，直接降级 | url={}", url)
+        return None
 
     try:
-        # 直接使用 json=payload，不再需要手动 json.dumps 和声明 Header
-        response = requests.post(
+        # 请求体与响应均用 orjson（C 实现）编解码，候选较多时明显快于标准库 json
+        response = await _ASYNC_CLIENT.post(
             url,
-            json=payload,
-            timeout=10,
-        )
-        
-        # 如果不是 200，这行会抛出 HTTPError
-        response.raise_for_status() 
-        
-        result = response.json()
-        
-        # 兼容不同 Reranker 的返回格式
-        # 假设响应格式为: [{"index": 2, "score": 0.99}, {"index": 0, "score": 0.39}]
-        sorted_result = sorted(result, key=lambda x: x.get("score", 0), reverse=True)
-        indices = [item["index"] for item in sorted_result]
-        
-        logger.debug(
-            "本地 Reranker 重排成功 | top_score={:.4f}",
-            sorted_result[0].get("score", 0) if sorted_result else 0,
-        )
-        logger.warning(
-            "本地 Reranker 重排成功 | top_score={:.4f}",
-            sorted_result[0].get("score", 0) if sorted_result else 0,
+            content=orjson.dumps({"query": query, "texts": valid_texts}),
+            headers=_JSON_HEADERS,
         )
+        _last_contact = time.monotonic()
+        response.raise_for_status()
+        indices = _expand_ranking(_rank_local_result(orjson.loads(response.content), top_n), groups, top_n)
+        _record_success()
+        _rerank_cache_put(cache_key, indices)
         return indices
 
-    except requests.exceptions.HTTPError as e:
-        # 捕获 HTTP 错误，并把服务端真正的报错信息（response.text）打印出来
-        logger.warning("本地 Reranker HTTP 错误，触发降级 | url={} | status={} | detail={}", 
+    except httpx.HTTPStatusError as e:
+        logger.warning("本地 Reranker HTTP 错误，触发降级 | url={} | status={} | detail={}",
                        url, e.response.status_code, e.response.text)
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         logger.warning("本地 Reranker 连接失败，触发降级 | url={}", url)
-    except requests.exceptions.Timeout:
+    except httpx.TimeoutException:
         logger.warning("本地 Reranker 调用超时（>10s），触发降级 | url={}", url)
+    except asyncio.CancelledError:
+        # 请求被取消（如应用关闭）时不计入失败，但需释放半开试探名额
+        _breaker_release()
+        raise
     except Exception as e:
         logger.warning("本地 Reranker 异常，触发降级 | error={}", str(e))
 
+    _record_failure()
     return None
 
+
+def _rerank_cache_key(query: str, texts: List[str], top_n: int) -> Tuple[bytes, bytes, int]:
+    """以 query 与候选文本的短摘要作为缓存键，避免在缓存中保存全文。"""
+    return (
+        hashlib.blake2b(query.encode("utf-8"), digest_size=8).digest(),
+        hashlib.blake2b("\0".join(texts).encode("utf-8"), digest_size=16).digest(),
+        top_n,
+    )
+
+
+def _rerank_cache_get(key: Tuple[bytes, bytes, int]) -> Optional[List[int]]:
+    if not RERANK_CACHE_ENABLED:
+        return None
+    cached = _rerank_cache.get(key)
+    if cached is None:
+        return None
+    _rerank_cache.move_to_end(key)
+    logger.debug("命中本地重排结果缓存")
+    return list(cached)
+
+
+def _rerank_cache_put(key: Tuple[bytes, bytes, int], indices: List[int]) -> None:
+    if not RERANK_CACHE_ENABLED:
+        return
+    _rerank_cache[key] = list(indices)
+    _rerank_cache.move_to_end(key)
+    if len(_rerank_cache) > RERANK_CACHE_SIZE:
+        _rerank_cache.popitem(last=False)
+
+
+def _breaker_open() -> bool:
+    """熔断器是否拒绝本地重排：冷却期内，或半开状态下已有试探请求在进行。"""
+    return time.monotonic() < _cb_open_until or _cb_trial_inflight
+
+
+def _breaker_acquire() -> bool:
+    """
+    发起本地重排请求前调用，返回是否允许请求。
+
+    半开状态下第一个调用方获得试探名额，直到其结果经 _record_success / _record_failure
+    （或 _breaker_release）结算前，其余调用方均被拒绝。
+    """
+    global _cb_trial_inflight
+    if _breaker_open():
+        return False
+    if _cb_tripped:
+        _cb_trial_inflight = True
+    return True
+
+
+def _breaker_release() -> None:
+    """释放未结算的半开试探名额，由下一个请求重新试探。"""
+    global _cb_trial_inflight
+    _cb_trial_inflight = False
+
+
+def _record_success() -> None:
+    """记录一次本地重排成功，清零失败计数并关闭熔断器。"""
+    global _cb_failures, _cb_tripped, _cb_trial_inflight
+    _cb_failures = 0
+    if _cb_tripped:
+        _cb_tripped = False
+        _cb_trial_inflight = False
+        logger.info("本地 Reranker 已恢复，关闭熔断 | url={}", RERANKER_URL)
+
+
+def _record_failure() -> None:
+    """记录一次本地重排失败，连续失败达到阈值（或半开试探失败）时打开熔断器。"""
+    global _cb_failures, _cb_open_until, _cb_tripped, _cb_trial_inflight
+    _cb_failures += 1
+    if _cb_trial_inflight or _cb_failures >= RERANKER_CB_FAILURES:
+        _cb_open_until = time.monotonic() + RERANKER_CB_COOLDOWN
+        _cb_failures = 0
+        _cb_tripped = True
+        _cb_trial_inflight = False
+        logger.warning("本地 Reranker 连续失败，熔断 {}s | url={}", RERANKER_CB_COOLDOWN, RERANKER_URL)
+
+
+def _rank_local_result(result: List[Dict[str, Any]], top_n: int) -> List[int]:
+    """
+    从本地 Reranker 响应中取得分最高的 top_n 个原始索引。
+
+    响应格式: [{"index": 2, "score": 0.99}, {"index": 0, "score": 0.39}]
+    """
+    # 只需 Top-N，用堆选取（O(K log N)），不对全部候选排序
+    sorted_result = heapq.nlargest(top_n, result, key=lambda x: x.get("score", 0))
+    logger.debug(
+        "本地 Reranker 重排成功 | top_score={:.4f}",
+        sorted_result[0].get("score", 0) if sorted_result else 0,
+    )
+    return [item["index"] for item in sorted_result]
+
 # ──────────────────────────────────────────────────────────────
 # Level 2: 内部 Embedding 余弦相似度重排
 # ──────────────────────────────────────────────────────────────
 
-def _try_embedding_rerank(query: str, texts: List[str]) -> Optional[List[int]]:
+async def _try_embedding_rerank_async(
+    query: str,
+    texts: List[str],
+    top_n: int,
+    query_vector: Optional[List[float]] = None,
+) -> Optional[List[int]]:
     """
     使用 Embedding API 计算 query 与各候选文本的余弦相似度，并按相似度降序排列。
 
     Args:
-        query: 查询文本。
-        texts: 候选文本列表。
+        query:        查询文本。
+        texts:        候选文本列表。
+        top_n:        返回的索引数量。
+        query_vector: 已计算好的 query 向量；为 None 时与候选文本一并向量化。
 
     Returns:
-        按余弦相似度降序排列的原始索引列表；失败时返回 None。
+        按余弦相似度降序排列的前 top_n 个原始索引；失败时返回 None。
     """
     try:
-        all_texts = [query] + texts
-        response = _embed_client.embeddings.create(
+        unique_texts, groups = _dedup_texts(texts)
+        if not unique_texts:
+            return None
+        all_texts = unique_texts if query_vector is not None else [query] + unique_texts
+        response = await _async_embed_client.embeddings.create(
             model=EMBEDDING_MODEL_NAME,
             input=all_texts,
         )
-        # 解析向量，按 index 排序确保顺序正确
-        sorted_data = sorted(response.data, key=lambda x: x.index)
-        embeddings = [item.embedding for item in sorted_data]
-
-        query_vec = embeddings[0]
-        candidate_vecs = embeddings[1:]
-
-        # 计算余弦相似度
-        scores: List[Tuple[int, float]] = []
-        for idx, vec in enumerate(candidate_vecs):
-            score = _cosine_similarity(query_vec, vec)
-            scores.append((idx, score))
-
-        scores.sort(key=lambda x: x[1], reverse=True)
-        indices = [idx for idx, _ in scores]
-        logger.debug("Embedding 余弦重排成功 | top_score={:.4f}", scores[0][1] if scores else 0)
-        return indices
+        return _expand_ranking(_rank_by_embeddings(response.data, top_n, query_vector), groups, top_n)
 
     except Exception as e:
         logger.warning("Embedding 降级重排失败 | error={}", str(e))
         return None
 
 
+def _rank_by_embeddings(
+    data: list,
+    top_n: int,
+    query_vector: Optional[List[float]],
+) -> List[int]:
+    """
+    根据 Embedding API 响应计算余弦相似度，返回前 top_n 个候选索引。
+
+    query_vector 为 None 时响应第 0 项为 query 向量，其余为候选向量；否则响应全部为候选向量。
+    """
+    # 按 index 直接放入对应位置（index 为 0..N-1 的稠密区间，无需排序），
+    # 再在 API 边界一次性转为连续的 (N, D) float32 矩阵
+    vectors: List[List[float]] = [None] * len(data)  # type: ignore[list-item]
+    for item in data:
+        vectors[item.index] = item.embedding
+    mat = np.ascontiguousarray(vectors, dtype=np.float32)
+    if query_vector is not None:
+        scores = _cosine_scores(np.asarray(query_vector, dtype=np.float32), mat)
+    else:
+        scores = _cosine_scores(mat[0], mat[1:])
+
+    # 只需 Top-N：argpartition（快速选择，O(K)）取出前 top_n 个后仅对这 N 个排序
+    if top_n < len(scores):
+        order = np.argpartition(-scores, top_n)[:top_n]
+        order = order[np.argsort(-scores[order], kind="stable")]
+    else:
+        order = np.argsort(-scores, kind="stable")
+    logger.debug("Embedding 余弦重排成功 | top_score={:.4f}", float(scores[order[0]]) if len(order) else 0)
+    return order.tolist()
+
+
 # ──────────────────────────────────────────────────────────────
 # 辅助函数
 # ──────────────────────────────────────────────────────────────
 
-def _cosine_similarity(vec_a: List[float], vec_b: List[float]) -> float:
+def _cosine_scores(query_vec: np.ndarray, mat: np.ndarray) -> np.ndarray:
     """
-    计算两个向量的余弦相似度。
+    计算 query 向量与矩阵各行的余弦相似度。
 
     Args:
-        vec_a: 向量 A。
-        vec_b: 向量 B。
+        query_vec: 形状 (D,) 的 float32 query 向量。
+        mat:       形状 (N, D) 的 float32 候选向量矩阵。
 
     Returns:
-        余弦相似度值，范围 [-1, 1]。
+        形状 (N,) 的相似度数组。
     """
-    dot = sum(a * b for a, b in zip(vec_a, vec_b))
-    norm_a = sum(a ** 2 for a in vec_a) ** 0.5
-    norm_b = sum(b ** 2 for b in vec_b) ** 0.5
+    # 不归一化矩阵本身：先做一次矩阵-向量乘，再按行乘以范数倒数（O(N) 而非 O(N·D) 的除法）；
+    # query 范数只算一次
+    inv_norms = 1.0 / np.sqrt(np.maximum(np.einsum("ij,ij->i", mat, mat), 1e-24))
+    inv_query_norm = 1.0 / max(float(np.sqrt(query_vec @ query_vec)), 1e-12)
+    return (mat @ query_vec) * inv_norms * inv_query_norm
+
 
-    if norm_a == 0 or norm_b == 0:
-        return 0.0
-    return dot / (norm_a * norm_b)
+def _dedup_texts(texts: List[str]) -> Tuple[List[str], List[List[int]]]:
+    """
+    去除空白文本并合并重复文本。
+
+    Args:
+        texts: 候选文本列表。
+
+    Returns:
+        (unique_texts, groups)：unique_texts[i] 为第 i 个唯一文本，
+        groups[i] 为其在原列表中出现的全部索引。
+    """
+    positions: Dict[str, List[int]] = {}
+    for idx, text in enumerate(texts):
+        if text.strip():
+            positions.setdefault(text, []).append(idx)
+    return list(positions), list(positions.values())
+
+
+def _expand_ranking(ranked_unique: List[int], groups: List[List[int]], top_n: int) -> List[int]:
+    """将唯一文本上的排序展开为原始索引（重复文本共享同一名次），截取前 top_n 个。"""
+    expanded: List[int] = []
+    for idx in ranked_unique:
+        if 0 <= idx < len(groups):
+            expanded.extend(groups[idx])
+            if len(expanded) >= top_n:
+                break
+    return expanded[:top_n]
 
 
 def _apply_ranking(
@@ -5,7 +5,7 @@ app/retrieval/retriever.py
 
 工作流：
   retrieve()：
-    1. 将 query 向量化（embeddings.py）
+    1. 将 query 向量化（embeddings.py）；与该用户近期 query 语义相近时直接返回缓存结果
     2. 同时生成 BM25 稀疏向量（bm25.py）
     3. 从 Milvus 执行混合检索（0.3*BM25 + 0.7*余弦，milvus_client.py）
     4. 对召回结果进行重排（reranker.py，带三级降级）
@@ -18,8 +18,11 @@ app/retrieval/retriever.py
 """
 
 import asyncio
+import time
 from datetime import datetime, timezone
-from typing import List
+from typing import List, Optional, Tuple
+
+import numpy as np
 
 from app.api.schemas import RetrievedChunk
 from app.core.config import settings
@@ -32,6 +35,87 @@ from app.retrieval.milvus_client import MilvusClient
 
 logger = get_logger(__name__)
 
+# 语义查询缓存容量（所有用户共享的环形缓冲条数）与命中阈值（余弦相似度）
+QVCACHE_SIZE = 256
+QVCACHE_THRESHOLD = 0.95
+
+# 语义缓存条目有效期（秒）：invalidate() 只作用于当前进程，多 worker 部署时
+# 其他 worker 写入的新记忆最迟在该时长后可见
+QVCACHE_TTL = 60.0
+
+
+class _QVCache:
+    """
+    语义查询缓存：保存近期 (query 向量, 检索结果)，新 query 与同一用户的某条缓存向量
+    余弦相似度不低于阈值时直接复用其结果，跳过 Milvus 检索与重排。
+
+    固定容量的环形缓冲（FIFO 淘汰），向量矩阵在首次写入时按维度分配，以 float16 存储
+    （内存减半，余弦误差约 1e-3，远小于命中阈值的余量）；
+    用户写入新记忆后需调用 invalidate() 使其缓存失效；条目超过 ttl 秒后同样不再命中。
+    """
+
+    def __init__(
+        self,
+        capacity: int = QVCACHE_SIZE,
+        threshold: float = QVCACHE_THRESHOLD,
+        ttl: float = QVCACHE_TTL,
+    ) -> None:
+        self._capacity = capacity
+        self._threshold = threshold
+        self._ttl = ttl
+        self._vecs: Optional[np.ndarray] = None  # (capacity, dim) float16，每行已 L2 归一化
+        self._users: List[Optional[str]] = [None] * capacity
+        self._payloads: List[Optional[List[RetrievedChunk]]] = [None] * capacity
+        self._expires: List[float] = [0.0] * capacity  # time.monotonic() 过期时刻
+        self._next = 0
+
+    @staticmethod
+    def normalize(vec: list) -> np.ndarray:
+        """将向量转为 L2 归一化的 float32 数组。"""
+        arr = np.asarray(vec, dtype=np.float32)
+        norm = float(np.linalg.norm(arr))
+        return arr / norm if norm > 0 else arr
+
+    def lookup(self, user_id: str, vec: np.ndarray) -> Optional[List[RetrievedChunk]]:
+        """返回该用户最相似且达到阈值的缓存结果（副本），未命中返回 None。"""
+        if self._vecs is None or vec.shape[0] != self._vecs.shape[1]:
+            return None
+        now = time.monotonic()
+        slots = [
+            i for i, u in enumerate(self._users)
+            if u == user_id and self._expires[i] > now
+        ]
+        if not slots:
+            return None
+        # 只取该用户的行并升为 float32 计算（NumPy 的 float16 矩阵乘不走 BLAS）
+        scores = self._vecs[slots].astype(np.float32) @ vec
+        best = int(np.argmax(scores))
+        if scores[best] < self._threshold:
+            return None
+        return list(self._payloads[slots[best]])
+
+    def insert(self, user_id: str, vec: np.ndarray, chunks: List[RetrievedChunk]) -> None:
+        """写入一条缓存，缓冲已满时覆盖最早的一条。"""
+        if self._vecs is None or vec.shape[0] != self._vecs.shape[1]:
+            self._vecs = np.zeros((self._capacity, vec.shape[0]), dtype=np.float16)
+            self._users = [None] * self._capacity
+            self._payloads = [None] * self._capacity
+            self._expires = [0.0] * self._capacity
+            self._next = 0
+        slot = self._next
+        self._vecs[slot] = vec
+        self._users[slot] = user_id
+        self._payloads[slot] = chunks
+        self._expires[slot] = time.monotonic() + self._ttl
+        self._next = (slot + 1) % self._capacity
+
+    def invalidate(self, user_id: str) -> None:
+        """清除指定用户的全部缓存条目。"""
+        for i, u in enumerate(self._users):
+            if u == user_id:
+                self._users[i] = None
+                self._payloads[i] = None
+
 
 class Retriever:
     """
@@ -52,6 +136,7 @@ class Retriever:
         )
         self._top_k = settings.retrieval_top_k
         self._rerank_top_n = settings.rerank_top_n
+        self._qvcache = _QVCache()
 
         # 尝试在初始化时连接 Milvus
         self._milvus.connect()
@@ -84,12 +169,22 @@ class Retriever:
         """
         logger.info("开始检索 | user_id={} | query[:50]={}", user_id, query[:50])
 
-        # Step 1: 向量化 query
-        query_vector = await self._embed_query(query)
+        # Step 1: 向量化 query，同时预热重排服务连接（连接建立耗时被向量化耗时掩盖）
+        query_vector, _ = await asyncio.gather(
+            self._embed_query(query),
+            self._warm_reranker(),
+        )
         if query_vector is None:
             logger.warning("query 向量化失败，返回空检索结果 | user_id={}", user_id)
             return []
 
+        # 语义缓存：与该用户近期某条 query 足够相似时直接复用结果
+        normalized_vec = _QVCache.normalize(query_vector)
+        cached = self._qvcache.lookup(user_id, normalized_vec)
+        if cached is not None:
+            logger.info("命中语义查询缓存 | user_id={} | chunks={}", user_id, len(cached))
+            return cached
+
         # Step 2: Milvus 混合检索（0.3*BM25 + 0.7*余弦，多租户隔离）
         raw_hits = await self._milvus_search(
             user_id=user_id,
@@ -101,7 +196,7 @@ class Retriever:
             return []
 
         # Step 3: 重排（带三级降级）
-        reranked = await self._rerank(query=query, candidates=raw_hits)
+        reranked, level = await self._rerank(query=query, candidates=raw_hits, query_vector=query_vector)
 
         # Step 4: 转换为 RetrievedChunk 格式
         chunks = [
@@ -117,6 +212,9 @@ class Retriever:
             )
             for hit in reranked
         ]
+        # 兜底（未重排）的结果不缓存，避免一次降级被后续相似 query 反复复用
+        if chunks and level != reranker_module.LEVEL_FALLBACK:
+            self._qvcache.insert(user_id, normalized_vec, list(chunks))
 
         logger.info("检索完成 | user_id={} | chunks={}", user_id, len(chunks))
         return chunks
@@ -147,12 +245,12 @@ class Retriever:
         logger.info("开始存储记忆 | user_id={} | texts={}", user_id, len(texts))
 
         # Step 1: 文本分块
-        chunks = self._chunker.chunk_texts(texts)
-        if not chunks:
+        batch = self._chunker.chunk_batch(texts)
+        if not batch.contents:
             logger.warning("分块结果为空，跳过存储 | user_id={}", user_id)
             return 0
 
-        chunk_contents = [c.content for c in chunks]
+        chunk_contents = batch.contents
         ts_str = timestamp.strftime("%Y-%m-%dT%H:%M:%SZ")
 
         # Step 2: 批量向量化
@@ -168,6 +266,9 @@ class Retriever:
             embeddings=embeddings,
             timestamp=ts_str,
         )
+        if stored:
+            # 新记忆写入后，该用户的语义缓存结果可能已过时
+            self._qvcache.invalidate(user_id)
 
         logger.info("记忆存储完成 | user_id={} | chunks_stored={}", user_id, stored)
         return stored
@@ -177,10 +278,10 @@ class Retriever:
     # ──────────────────────────────────────────────────────────
 
     async def _embed_query(self, query: str) -> list | None:
-        """异步向量化单条 query，失败返回 None。"""
-        loop = asyncio.get_event_loop()
+        """异步向量化单条 query（重复 query 命中进程内 LRU 缓存），失败返回 None。"""
+        loop = asyncio.get_running_loop()
         try:
-            vec = await loop.run_in_executor(None, emb_module.embed_single, query)
+            vec = await loop.run_in_executor(None, emb_module.embed_query, query)
             return vec
         except EmbeddingError as e:
             logger.error("query 向量化失败 | error={}", e)
@@ -190,11 +291,9 @@ class Retriever:
             return None
 
     async def _embed_texts(self, texts: List[str]) -> list | None:
-        """异步批量向量化文本列表，失败返回 None。"""
-        loop = asyncio.get_event_loop()
+        """异步批量向量化文本列表（先查持久化向量缓存，未命中部分各批次并发请求），失败返回 None。"""
         try:
-            vecs = await loop.run_in_executor(None, emb_module.embed_texts, texts)
-            return vecs
+            return await emb_module.embed_texts_cached(texts)
         except EmbeddingError as e:
             logger.error("批量向量化失败 | error={}", e)
             return None
@@ -209,18 +308,13 @@ class Retriever:
         query_text: str = "",
     ) -> list:
         """异步执行 Milvus 混合检索（BM25+余弦），不可用时返回空列表（降级）。"""
-        loop = asyncio.get_event_loop()
         try:
-            hits = await loop.run_in_executor(
-                None,
-                lambda: self._milvus.search(
-                    user_id=user_id,
-                    query_vector=query_vector,
-                    query_text=query_text,
-                    top_k=self._top_k,
-                ),
+            return await self._milvus.search_async(
+                user_id=user_id,
+                query_vector=query_vector,
+                query_text=query_text,
+                top_k=self._top_k,
             )
-            return hits
         except MilvusUnavailableError:
             logger.warning("Milvus 检索失败，降级为空结果 | user_id={}", user_id)
             return []
@@ -236,39 +330,43 @@ class Retriever:
         timestamp: str,
     ) -> int:
         """异步写入 Milvus，失败返回 0（降级）。"""
-        loop = asyncio.get_event_loop()
         try:
-            count = await loop.run_in_executor(
-                None,
-                lambda: self._milvus.insert(
-                    user_id=user_id,
-                    contents=contents,
-                    embeddings=embeddings,
-                    timestamp=timestamp,
-                ),
+            return await self._milvus.insert_async(
+                user_id=user_id,
+                contents=contents,
+                embeddings=embeddings,
+                timestamp=timestamp,
             )
-            return count
         except Exception as e:
             logger.error("Milvus 写入失败 | user_id={} | error={}", user_id, e)
             return 0
 
+    async def _warm_reranker(self) -> None:
+        """异步预热本地重排服务连接，失败不影响检索。"""
+        try:
+            await reranker_module.warm_up_async()
+        except Exception as e:
+            logger.debug("重排服务预热异常 | error={}", e)
+
     async def _rerank(
         self,
         query: str,
         candidates: list,
-    ) -> list:
-        """异步执行重排，任何级别失败均降级。"""
-        loop = asyncio.get_event_loop()
+        query_vector: list | None = None,
+    ) -> Tuple[list, str]:
+        """
+        异步执行重排（HTTP 请求直接在事件循环内发起，不占用线程池），任何级别失败均降级。
+
+        Returns:
+            (重排结果, 实际生效的级别 reranker.LEVEL_*)。
+        """
         try:
-            reranked = await loop.run_in_executor(
-                None,
-                lambda: reranker_module.rerank(
-                    query=query,
-                    candidates=candidates,
-                    top_n=self._rerank_top_n,
-                ),
+            return await reranker_module.rerank_async(
+                query=query,
+                candidates=candidates,
+                top_n=self._rerank_top_n,
+                query_vector=query_vector,
             )
-            return reranked
         except Exception as e:
             logger.error("重排失败，返回原始 Top-N 结果 | error={}", e)
-            return candidates[: self._rerank_top_n]
+            return candidates[: self._rerank_top_n], reranker_module.LEVEL_FALLBACK